@@ -1,5 +1,28 @@
 import polars as pl, sys, os, numpy as np
 
+# Non-signal columns of the epoched input
+_META_COLS = frozenset({'time', 'sfreq', 'epoch_id', 'condition'})
+
+def _epoch_values(sig: np.ndarray, starts: np.ndarray, method: str) -> np.ndarray:
+    """Per-epoch amplitude; epochs are the contiguous segments of sig beginning at starts. Sums accumulate in float64."""
+    lengths = np.diff(np.append(starts, len(sig)))
+    # Equal-length epochs (the usual case) tile the slice exactly: reduce a 2D view along axis 1
+    ep = sig.reshape(len(starts), -1) if len(starts) and (lengths == lengths[0]).all() else None
+    
+    if method == 'peak_baseline':
+        if ep is not None:
+            baseline = ep[:, :int(lengths[0] * 0.2)].mean(axis=1, dtype=np.float64)
+        else:
+            # Baseline = mean of the first 20% of each epoch, from a running sum
+            n_base = (lengths * 0.2).astype(np.int64)
+            csum = np.concatenate(([0.0], np.cumsum(sig, dtype=np.float64)))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                baseline = (csum[starts + n_base] - csum[starts]) / n_base
+        return (ep.max(axis=1) if ep is not None else np.maximum.reduceat(sig, starts)) - baseline
+    if method == 'peak':
+        return ep.max(axis=1) if ep is not None else np.maximum.reduceat(sig, starts)
+    return ep.mean(axis=1, dtype=np.float64) if ep is not None else np.add.reduceat(sig, starts, dtype=np.float64) / lengths  # 'mean' and unknown methods
+
 def analyze_amplitude(ip: str, method: str = 'peak_baseline', y_lim: float | None = None, y_label: str = 'Amplitude', suffix: str = 'amp') -> str:
     """Analyze amplitude per condition: mean amplitude change per trial.
     Generic amplitude analyzer - works on any signal.
@@ -15,59 +38,60 @@ def analyze_amplitude(ip: str, method: str = 'peak_baseline', y_lim: float | Non
         Path to signal file
     """
     print(f"[amplitude] Amplitude analysis: {ip}, method={method}")
-    df = pl.read_parquet(ip)
+    columns = list(pl.read_parquet_schema(ip))
     
-    if 'condition' not in df.columns or 'epoch_id' not in df.columns:
+    if 'condition' not in columns or 'epoch_id' not in columns:
         raise ValueError("Input must have 'condition' and 'epoch_id' columns")
     
-    # Auto-detect signal column
-    signal_col = [c for c in df.columns if c not in ['time', 'sfreq', 'epoch_id', 'condition']][0]
-    conditions = sorted(df['condition'].unique().to_list())
+    # Auto-detect signal column from the schema: first non-meta column, no data read yet
+    signal_col = next((c for c in columns if c not in _META_COLS), None)
+    if signal_col is None:
+        raise ValueError("Input has no signal column")
+    # Only the grouping keys and the signal are decoded (time/sfreq are not used); the signal is held as
+    # float32, halving the bytes sorted and scanned, while every sum below still accumulates in float64
+    df = pl.read_parquet(ip, columns=['condition', 'epoch_id', signal_col]).with_columns(pl.col(signal_col).cast(pl.Float32))
     base = os.path.splitext(os.path.basename(ip))[0]
     out_folder = os.path.join(os.getcwd(), f"{base}_{suffix}")
     os.makedirs(out_folder, exist_ok=True)
     
-    print(f"[amplitude] Processing {len(conditions)} conditions, signal column: {signal_col}")
+    # Sort once by (condition, epoch_id), in-engine: conditions come out in sorted order and
+    # each epoch is a contiguous segment, so no boolean filter is built per condition or epoch
+    df = df.sort(['condition', 'epoch_id'], maintain_order=True)
+    # One contiguous float32 buffer (no-op when polars already hands one out) so every slice is a strided view
+    sig_all = np.ascontiguousarray(df[signal_col].to_numpy(), dtype=np.float32)
+    seg_starts = np.flatnonzero(df.select(pl.struct('condition', 'epoch_id').is_first_distinct()).to_series().to_numpy())
+    
+    # All epochs of all conditions in one pass, then one group_by reduces them per condition
+    values = _epoch_values(sig_all, seg_starts, method).astype(np.float64, copy=False)
+    stats = pl.DataFrame({'condition': df['condition'].gather(seg_starts), 'value': values}).group_by(
+        'condition', maintain_order=True).agg(
+        pl.col('value').mean().alias('mean'),
+        (pl.col('value').std(ddof=1) / pl.len().sqrt()).fill_null(0.0).alias('sem'),
+        pl.len().alias('n'))
+    # Conditions (sorted, unique) are the group keys: no separate unique() + Python sort pass
+    print(f"[amplitude] Processing {stats.height} conditions, signal column: {signal_col}")
+    
+    # All condition rows built as one frame; each per-condition file is then a zero-copy slice of it
+    summary = stats.select(
+        'condition',
+        pl.concat_list(pl.lit(method)).alias('x_data'),
+        pl.concat_list('mean').alias('y_data'),
+        pl.concat_list('sem').alias('y_var'),
+        pl.lit('bar').alias('plot_type'),
+        pl.lit('').alias('x_label'),
+        pl.lit(y_label).alias('y_label'),
+        pl.lit(y_lim).alias('y_ticks'),
+        pl.col('n').cast(pl.Int64).alias('count'))
     
-    for idx, cond in enumerate(conditions):
-        cond_df = df.filter(pl.col('condition') == cond)
-        epochs = cond_df['epoch_id'].unique().to_list()
-        
-        values = []
-        for eid in epochs:
-            epoch_data = cond_df.filter(pl.col('epoch_id') == eid)[signal_col].to_numpy()
-            
-            if method == 'peak_baseline':
-                baseline = np.mean(epoch_data[:int(len(epoch_data)*0.2)])
-                values.append(np.max(epoch_data) - baseline)
-            elif method == 'mean':
-                values.append(np.mean(epoch_data))
-            elif method == 'peak':
-                values.append(np.max(epoch_data))
-            else:
-                values.append(np.mean(epoch_data))
-        
-        mean_val = float(np.mean(values))
-        sem_val = float(np.std(values, ddof=1) / np.sqrt(len(values))) if len(values) > 1 else 0.0
-        
-        pl.DataFrame({
-            'condition': [cond],
-            'x_data': [[method]],
-            'y_data': [[mean_val]],
-            'y_var': [[sem_val]],
-            'plot_type': ['bar'],
-            'x_label': [''],
-            'y_label': [y_label],
-            'y_ticks': [y_lim] if y_lim is not None else [None],
-            'count': [len(values)]
-        }).write_parquet(os.path.join(out_folder, f"{base}_{suffix}{idx+1}.parquet"))
-        print(f"[amplitude]   {cond}: {mean_val:.3f} ± {sem_val:.3f} ({len(values)} trials)")
+    for idx, (part, (cond, mean_val, sem_val, n)) in enumerate(zip(summary.partition_by('condition', maintain_order=True), stats.iter_rows())):
+        part.write_parquet(os.path.join(out_folder, f"{base}_{suffix}{idx+1}.parquet"))
+        print(f"[amplitude]   {cond}: {mean_val:.3f} ± {sem_val:.3f} ({n} trials)")
     
     signal_path = os.path.join(os.getcwd(), f"{base}_{suffix}.parquet")
     pl.DataFrame({
         'signal': [1],
         'source': [os.path.basename(ip)],
-        'conditions': [len(conditions)],
+        'conditions': [stats.height],
         'folder_path': [os.path.abspath(out_folder)]
     }).write_parquet(signal_path)
     
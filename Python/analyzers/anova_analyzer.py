@@ -5,12 +5,19 @@ import statsmodels.stats.multitest as mt
 def anova_analyze(ip: str, dv: str, between: str, participant_id: str, apply_fdr: bool = False, y_lim: float | None = None) -> str:
     if not os.path.exists(ip): print(f"[anova] File not found: {ip}"); sys.exit(1)
     print(f"[anova] ANOVA: {ip}, dv={dv}, between={between}, fdr={apply_fdr}")
-    df = pl.read_parquet(ip).to_pandas()
-    results = pl.DataFrame(pg.anova(data=df, dv=dv, between=between, detailed=True))
+    # Only the ANOVA columns cross into pandas
+    df = pl.read_parquet(ip, columns=[dv, between]).to_pandas()
+    # Cheap NaN pre-flight: bail out on empty input, only copy when rows must be dropped
+    na_mask = df[[dv, between]].isna().any(axis=1)
+    if na_mask.all(): print(f"[anova] No valid rows for dv={dv}, between={between}"); sys.exit(1)
+    if na_mask.any(): df = df.loc[~na_mask]
+    results = pg.anova(data=df, dv=dv, between=between, detailed=True)
     if apply_fdr:
+        # FDR columns added on pingouin's frame, so it is converted to polars exactly once
         rejected, p_fdr = mt.fdrcorrection(results['p-unc'].to_numpy())
-        results = results.with_columns([pl.Series("p_fdr", p_fdr), pl.Series("rejected", rejected)])
-    results = results.with_columns([
+        results['p_fdr'] = p_fdr
+        results['rejected'] = rejected
+    results = pl.from_pandas(results).with_columns([
         pl.lit("bar").alias("plot_type"), pl.lit("ordinal").alias("x_scale"), pl.lit("nominal").alias("y_scale"),
         pl.col("Source").alias("x_data"), pl.col("F").alias("y_data"), pl.lit("F-statistic").alias("y_label"),
         pl.lit(y_lim).alias("y_ticks"), pl.lit(1).alias("plot_weight")])
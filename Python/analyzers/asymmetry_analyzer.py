@@ -1,4 +1,9 @@
-import polars as pl, numpy as np, sys, ast, os
+import polars as pl, numpy as np, sys, ast, os, math
+from functools import lru_cache
+try:
+    from numba import njit  # Optional: JIT-compiled asymmetry kernel for batch runs
+except ImportError:
+    njit = None
 
 def compute_asymmetry(ip: str, pairs: list[tuple[str,str]], mode: str = 'log', 
                       band: str | None = None, y_lim: float | None = None, 
@@ -44,31 +49,20 @@ def compute_asymmetry(ip: str, pairs: list[tuple[str,str]], mode: str = 'log',
         print(f"[asymmetry] Error: Unknown input format. Expected channel (channel,band,power) or ROI (x_data,y_data)")
         sys.exit(1)
     
-    # Compute asymmetry for each pair
+    # Compute asymmetry for all pairs at once
     # Note: data_dict values are (mean, sem) tuples
-    pair_names, asym_vals, asym_sems = [], [], []
-    for left, right in pairs:
-        left_val, left_sem = _get_value(data_dict, left)
-        right_val, right_sem = _get_value(data_dict, right)
-        
-        if left_val is not None and right_val is not None:
-            if mode == 'log' and left_val > 0 and right_val > 0:
-                # Log-ratio asymmetry: ln(R) - ln(L)
-                asym = np.log(right_val) - np.log(left_val)
-                # Error propagation for log difference: SE = sqrt((SE_R/R)^2 + (SE_L/L)^2)
-                sem = np.sqrt((right_sem / right_val)**2 + (left_sem / left_val)**2) if right_val and left_val else 0.0
-            else:
-                # Simple difference: R - L
-                asym = right_val - left_val
-                # Error propagation for difference: SE = sqrt(SE_R^2 + SE_L^2)
-                sem = np.sqrt(right_sem**2 + left_sem**2)
-            
-            pair_names.append(f"{left}-{right}")
-            asym_vals.append(float(asym))
-            asym_sems.append(float(sem))
-            print(f"[asymmetry]   {left}-{right}: L={left_val:.4f}±{left_sem:.4f}, R={right_val:.4f}±{right_sem:.4f}, Asym={asym:.4f}±{sem:.4f}")
-        else:
-            print(f"[asymmetry] Warning: Missing data for pair {left}-{right}")
+    names, lefts, rights = _parse_pairs(tuple(tuple(p) for p in pairs))
+    looked_up = [(name, *_get_value(data_dict, left), *_get_value(data_dict, right)) for name, left, right in zip(names, lefts, rights)]
+    missing = [t[0] for t in looked_up if t[1] is None or t[3] is None]
+    if missing:
+        print(f"[asymmetry] Warning: Missing data for pair(s) {', '.join(missing)}")
+    valid = [t for t in looked_up if t[1] is not None and t[3] is not None]
+    pair_names = [t[0] for t in valid]
+    left_vals, left_sems, right_vals, right_sems = (np.array([t[k] for t in valid], dtype=np.float64) for k in (1, 2, 3, 4))
+    asym_arr, sem_arr = _asymmetry(left_vals, left_sems, right_vals, right_sems, mode == 'log')
+    asym_vals, asym_sems = asym_arr.tolist(), sem_arr.tolist()
+    for name, lv, ls, rv, rs, asym, sem in zip(pair_names, left_vals, left_sems, right_vals, right_sems, asym_vals, asym_sems):
+        print(f"[asymmetry]   {name}: L={lv:.4f}±{ls:.4f}, R={rv:.4f}±{rs:.4f}, Asym={asym:.4f}±{sem:.4f}")
     
     out_path = os.path.join(os.getcwd(), f"{base}_{suffix}.parquet")
     pl.DataFrame({
@@ -86,6 +80,39 @@ def compute_asymmetry(ip: str, pairs: list[tuple[str,str]], mode: str = 'log',
     print(out_path)
     return out_path
 
+@lru_cache(maxsize=None)
+def _parse_pairs(pairs: tuple[tuple[str, str], ...]) -> tuple[tuple[str, ...], tuple[str, ...], tuple[str, ...]]:
+    """Parse a pair config once into (names, lefts, rights); reused across conditions/participants."""
+    return tuple(f"{left}-{right}" for left, right in pairs), tuple(left for left, _ in pairs), tuple(right for _, right in pairs)
+
+def _asymmetry(left: np.ndarray, left_sem: np.ndarray, right: np.ndarray, right_sem: np.ndarray, log_mode: bool) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized asymmetry over all pairs.
+    
+    Log mode uses ln(R) - ln(L) with SE = sqrt((SE_R/R)^2 + (SE_L/L)^2) where both values are positive;
+    all other pairs fall back to R - L with SE = sqrt(SE_R^2 + SE_L^2)."""
+    if njit is not None:
+        return _asymmetry_kernel(left, left_sem, right, right_sem, log_mode)
+    asym, sem = right - left, np.sqrt(right_sem**2 + left_sem**2)
+    if log_mode:
+        m = (left > 0) & (right > 0)
+        asym[m] = np.log(right[m]) - np.log(left[m])
+        sem[m] = np.sqrt((right_sem[m] / right[m])**2 + (left_sem[m] / left[m])**2)
+    return asym, sem
+
+def _asymmetry_kernel(left, left_sem, right, right_sem, log_mode):
+    """Scalar loop equivalent of _asymmetry, compiled with numba when available."""
+    asym, sem = np.empty_like(left), np.empty_like(left)
+    for i in range(left.size):
+        if log_mode and left[i] > 0 and right[i] > 0:
+            asym[i] = math.log(right[i]) - math.log(left[i])
+            sem[i] = math.sqrt((right_sem[i] / right[i])**2 + (left_sem[i] / left[i])**2)
+        else:
+            asym[i] = right[i] - left[i]
+            sem[i] = math.sqrt(right_sem[i]**2 + left_sem[i]**2)
+    return asym, sem
+
+if njit is not None: _asymmetry_kernel = njit(cache=True)(_asymmetry_kernel)
+
 def _extract_channel_data(df: pl.DataFrame, band: str) -> dict[str, tuple[float, float]]:
     """Extract {channel: (value, SEM)} from channel format.
     
@@ -95,9 +122,12 @@ def _extract_channel_data(df: pl.DataFrame, band: str) -> dict[str, tuple[float,
     for row in df.filter(pl.col('band') == band).to_dicts():
         ch = row['channel']
         power = float(row['power'])
-        std = float(row.get('power_std', 0.0))
-        n = int(row.get('n_epochs', 1))
-        sem = std / np.sqrt(n) if n > 0 else std  # Convert std to SEM
+        # power_std is null for single-epoch groups; treat missing/null as zero spread
+        std = row.get('power_std')
+        std = float(std) if std is not None else 0.0
+        n = row.get('n_epochs')
+        n = int(n) if n is not None else 1
+        sem = std / math.sqrt(n) if n > 0 else std  # Convert std to SEM
         data[ch] = (power, sem)
     return data
 
@@ -115,8 +145,9 @@ def _extract_roi_data(row: dict) -> dict[str, tuple[float, float]]:
 
 def _get_value(data: dict, key: str) -> tuple[float | None, float]:
     """Get value by exact key or partial match."""
-    if key in data:
-        return data[key]
+    value = data.get(key)
+    if value is not None:
+        return value
     # Try partial match (e.g., 'Left' matches 'Left PFC')
     for k, v in data.items():
         if key.lower() in k.lower():
@@ -1,24 +1,37 @@
 import polars as pl, numpy as np, sys, os, json, fnmatch, re
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from orjson import loads as _json_loads  # Optional: C JSON parser for large group configs
+except ImportError:
+    _json_loads = json.loads
+
+# Channel naming patterns for auto-detected groups, compiled once
+_SRC_DET_RE = re.compile(r'^(\d+)-(\d+)')  # "source-detector" (e.g., "1-1:0", "2-3")
+_S_D_RE = re.compile(r'^S(\d+)_D(\d+)')     # "S1_D1" style
 
 def _match_channels(patterns: list[str], available: list[str]) -> list[str]:
     """
     Match channel patterns against available channel names.
     Supports: exact match, prefix match, glob patterns (*, ?), and regex (prefix with 're:').
     """
-    matched = []
+    matched, seen = [], set()
+    available_set = set(available)
     for pattern in patterns:
-        if pattern in available:
-            matched.append(pattern)
+        if pattern in available_set:
+            hits = [pattern]
         elif pattern.startswith('re:'):
             regex = re.compile(pattern[3:])
-            matched.extend([ch for ch in available if regex.search(ch) and ch not in matched])
+            hits = [ch for ch in available if regex.search(ch)]
         elif '*' in pattern or '?' in pattern or '[' in pattern:
-            matched.extend([ch for ch in available if fnmatch.fnmatch(ch, pattern) and ch not in matched])
+            hits = fnmatch.filter(available, pattern)
         else:
-            prefix_matches = [ch for ch in available if ch.startswith(pattern) and ch not in matched]
-            if prefix_matches:
-                matched.extend(prefix_matches)
+            hits = [ch for ch in available if ch.startswith(pattern)]
+        # Set membership keeps dedup O(1) per channel instead of scanning the matched list
+        for ch in hits:
+            if ch not in seen:
+                seen.add(ch)
+                matched.append(ch)
     return matched
 
 def _auto_detect_groups(ch_cols: list[str]) -> dict[str, list[str]]:
@@ -30,14 +43,14 @@ def _auto_detect_groups(ch_cols: list[str]) -> dict[str, list[str]]:
     
     for ch in ch_cols:
         # Try pattern: "source-detector" (e.g., "1-1:0", "2-3")
-        match = re.match(r'^(\d+)-(\d+)', ch)
+        match = _SRC_DET_RE.match(ch)
         if match:
             source = match.group(1)
             groups[f'S{source}'].append(ch)
             continue
         
         # Try pattern: "S1_D1" style
-        match = re.match(r'^S(\d+)_D(\d+)', ch)
+        match = _S_D_RE.match(ch)
         if match:
             source = match.group(1)
             groups[f'S{source}'].append(ch)
@@ -74,16 +87,16 @@ def analyze_groups(ip: str, groups_config: str, y_lim: float | None = None,
     if groups_config.lower() == 'auto':
         groups = {}
     elif os.path.isfile(groups_config):
-        with open(groups_config) as f:
-            groups = json.load(f)
+        with open(groups_config, 'rb') as f:
+            groups = _json_loads(f.read())
     else:
-        groups = json.loads(groups_config)
+        groups = _json_loads(groups_config)
     
     # Parse subplots config
     subplot_filters = {}
     if subplots and subplots.strip():
         try:
-            subplot_filters = json.loads(subplots.replace("'", '"'))
+            subplot_filters = _json_loads(subplots.replace("'", '"'))
         except:
             subplot_filters = eval(subplots)  # Handle Python dict syntax
     if not subplot_filters:
@@ -91,9 +104,10 @@ def analyze_groups(ip: str, groups_config: str, y_lim: float | None = None,
     
     print(f"[group] Subplots: {list(subplot_filters.keys()) if any(subplot_filters.keys()) else 'none'}")
     
-    df = pl.read_parquet(ip)
+    # Channels come from the schema; only the columns some group uses are read further down
+    schema_cols = list(pl.read_parquet_schema(ip))
     meta_cols = ['time', 'sfreq', 'epoch_id', 'condition']
-    all_ch_cols = [c for c in df.columns if c not in meta_cols]
+    all_ch_cols = [c for c in schema_cols if c not in meta_cols]
     
     print(f"[group] Total channels: {len(all_ch_cols)}")
     
@@ -123,15 +137,49 @@ def analyze_groups(ip: str, groups_config: str, y_lim: float | None = None,
     
     # Use first subplot's groups as reference for x-axis
     group_names = list(list(subplot_groups.values())[0].keys())
-    conditions = sorted(df['condition'].unique().to_list())
+    
+    # Resolve the (subplot, ROI) cells that have channels once; empty cells never touch the data
+    active_groups = {sp: {roi: chs for roi in group_names if (chs := subplot_groups[sp].get(roi))} for sp in subplot_names}
+    any_active = any(active_groups.values())
+    # Every channel used by any cell, and each cell's column positions within that block
+    used_chs = list(dict.fromkeys(ch for cells in active_groups.values() for chs in cells.values() for ch in chs))
+    ch_pos = {ch: i for i, ch in enumerate(used_chs)}
+    cell_cols = {sp: {roi: np.array([ch_pos[ch] for ch in chs]) for roi, chs in cells.items()} for sp, cells in active_groups.items()}
+    
+    # Column pruning: channels outside every group are never decoded
+    df = pl.read_parquet(ip, columns=[c for c in meta_cols if c in schema_cols] + used_chs)
     base = os.path.splitext(os.path.basename(ip))[0]
-    out_folder = os.path.join(os.getcwd(), f"{base}_{suffix}")
+    # Output locations resolved once; per-condition files only append their index
+    workspace = os.getcwd()
+    out_folder = os.path.join(workspace, f"{base}_{suffix}")
+    out_prefix = os.path.join(out_folder, f"{base}_{suffix}")
     os.makedirs(out_folder, exist_ok=True)
+    subplot_labels = [s for s in subplot_names if s]  # Filter empty names
+    
+    def write_signal(n_conditions: int) -> str:
+        """Signal file recording the run (also written when there is nothing to aggregate)."""
+        signal_path = os.path.join(workspace, f"{base}_{suffix}.parquet")
+        pl.DataFrame({
+            'signal': [1],
+            'source': [os.path.basename(ip)],
+            'conditions': [n_conditions],
+            'groups': [group_names],
+            'subplots': [subplot_labels if subplot_labels else []],
+            'folder_path': [out_folder]  # Already absolute: built from os.getcwd()
+        }).write_parquet(signal_path)
+        print(f"[group] Output: {signal_path}")
+        return signal_path
+    
+    if df.is_empty():
+        # Nothing to aggregate: no per-condition files, only the signal file records the run
+        print(f"[group] No rows in {os.path.basename(ip)}, no condition outputs written")
+        return write_signal(0)
+    conditions = sorted(df['condition'].unique().to_list())
     
     # Determine sampling frequency for baseline
     sfreq = float(df['sfreq'][0]) if 'sfreq' in df.columns else None
     if sfreq is None and 'time' in df.columns:
-        times = df['time'].unique().sort().to_list()
+        times = df['time'].unique().sort().head(2)  # Only the first step is needed
         if len(times) > 1:
             sfreq = 1.0 / (times[1] - times[0])
     baseline_samples = int(baseline_sec * sfreq) if sfreq else 0
@@ -140,35 +188,36 @@ def analyze_groups(ip: str, groups_config: str, y_lim: float | None = None,
     if baseline_samples > 0:
         print(f"[group] Baseline: {baseline_sec}s ({baseline_samples} samples)")
     
-    for idx, cond in enumerate(conditions):
+    def condition_stats(cond) -> tuple[int, list[list[float]], list[list[float]]]:
+        """Per-subplot ROI means and SEMs across epochs for one condition."""
         cond_df = df.filter(pl.col('condition') == cond)
-        epochs = cond_df['epoch_id'].unique().to_list()
+        n_epochs = cond_df['epoch_id'].n_unique()
+        # Each epoch converted to NumPy once; ROI cells then index columns of that block
+        epoch_blocks = [e.select(used_chs).to_numpy() for e in cond_df.partition_by('epoch_id', maintain_order=True)] if any_active else []
         
         # Compute for each subplot
         all_y_data = []
         all_y_var = []
         
         for sp_name in subplot_names:
-            valid_groups = subplot_groups[sp_name]
+            valid_cols = cell_cols[sp_name]
             roi_means, roi_sems = [], []
             
             for roi_name in group_names:
-                roi_chs = valid_groups.get(roi_name, [])
-                if not roi_chs:
+                roi_cols = valid_cols.get(roi_name)
+                if roi_cols is None:
                     roi_means.append(0.0)
                     roi_sems.append(0.0)
                     continue
                 
                 epoch_means = []
-                for eid in epochs:
-                    epoch_df = cond_df.filter(pl.col('epoch_id') == eid)
-                    roi_data = epoch_df.select(roi_chs).to_numpy()
+                for block in epoch_blocks:
+                    roi_data = block[:, roi_cols]
                     
                     if baseline_samples > 0 and roi_data.shape[0] > baseline_samples:
-                        baseline_mean = roi_data[:baseline_samples, :].mean(axis=0, keepdims=True)
-                        roi_data = roi_data - baseline_mean
-                        post_baseline = roi_data[baseline_samples:, :]
-                        epoch_means.append(float(np.mean(post_baseline)))
+                        # mean(post - baseline_mean) == mean(post) - mean(baseline_mean): slice views, no corrected copy
+                        baseline_mean = roi_data[:baseline_samples, :].mean(axis=0)
+                        epoch_means.append(float(roi_data[baseline_samples:, :].mean() - baseline_mean.mean()))
                     else:
                         epoch_means.append(float(np.mean(roi_data)))
                 
@@ -178,48 +227,32 @@ def analyze_groups(ip: str, groups_config: str, y_lim: float | None = None,
             all_y_data.append(roi_means)
             all_y_var.append(roi_sems)
         
-        # Output format depends on number of subplots
-        subplot_labels = [s for s in subplot_names if s]  # Filter empty names
-        if len(subplot_labels) > 1:
-            # Multiple subplots: nested y_data
-            pl.DataFrame({
-                'condition': [cond],
-                'x_data': [group_names],
-                'y_data': [all_y_data],
-                'y_var': [all_y_var],
-                'labels': [subplot_labels],
-                'plot_type': ['grid'],
-                'x_label': [x_label],
-                'y_label': [y_label],
-                'y_ticks': [y_lim] if y_lim is not None else [None]
-            }).write_parquet(os.path.join(out_folder, f"{base}_{suffix}{idx+1}.parquet"))
-        else:
-            # Single or no subplot: flat y_data
-            pl.DataFrame({
-                'condition': [cond],
-                'x_data': [group_names],
-                'y_data': [all_y_data[0]],
-                'y_var': [all_y_var[0]],
-                'plot_type': ['grid'],
-                'x_label': [x_label],
-                'y_label': [y_label],
-                'y_ticks': [y_lim] if y_lim is not None else [None]
-            }).write_parquet(os.path.join(out_folder, f"{base}_{suffix}{idx+1}.parquet"))
+        return n_epochs, all_y_data, all_y_var
+    
+    # Conditions are independent and the work is NumPy/polars-bound, so a thread pool runs them concurrently;
+    # results are written in condition order
+    with ThreadPoolExecutor(max_workers=min(32, len(conditions) or 1)) as ex:
+        cond_stats = list(ex.map(condition_stats, conditions))
+    
+    nested = len(subplot_labels) > 1
+    for idx, (cond, (n_epochs, all_y_data, all_y_var)) in enumerate(zip(conditions, cond_stats)):
+        # Output format depends on number of subplots: nested y_data (with labels) for several, flat otherwise.
+        # Single-row plot frames: column statistics are never used downstream, so they are not written
+        pl.DataFrame({
+            'condition': [cond],
+            'x_data': [group_names],
+            'y_data': [all_y_data if nested else all_y_data[0]],
+            'y_var': [all_y_var if nested else all_y_var[0]],
+            **({'labels': [subplot_labels]} if nested else {}),
+            'plot_type': ['grid'],
+            'x_label': [x_label],
+            'y_label': [y_label],
+            'y_ticks': [y_lim] if y_lim is not None else [None]
+        }).write_parquet(f"{out_prefix}{idx+1}.parquet", statistics=False)
         
-        print(f"[group]   {cond}: {len(epochs)} epochs, {len(group_names)} groups × {len(subplot_labels) or 1} subplots")
-    
-    signal_path = os.path.join(os.getcwd(), f"{base}_{suffix}.parquet")
-    pl.DataFrame({
-        'signal': [1],
-        'source': [os.path.basename(ip)],
-        'conditions': [len(conditions)],
-        'groups': [group_names],
-        'subplots': [subplot_labels if subplot_labels else []],
-        'folder_path': [os.path.abspath(out_folder)]
-    }).write_parquet(signal_path)
-    
-    print(f"[group] Output: {signal_path}")
-    return signal_path
+        print(f"[group]   {cond}: {n_epochs} epochs, {len(group_names)} groups × {len(subplot_labels) or 1} subplots")
+    
+    return write_signal(len(conditions))
 
 if __name__ == '__main__':
     (lambda a: analyze_groups(a[1], a[2],
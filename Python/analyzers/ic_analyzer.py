@@ -10,15 +10,16 @@ def analyze_ica(ip: str, n_components: float = 0.99, y_lim: float | None = None)
     original_sfreq = raw.info['sfreq']
     print(f"[ic] Loaded: {len(raw.ch_names)} channels, sfreq={original_sfreq} Hz")
     target_sfreq = 250.0
-    raw_for_ica = raw.copy().resample(target_sfreq, verbose=False) if original_sfreq > target_sfreq else raw.copy()
+    # ICA.fit only reads the data, so the loaded Raw is used directly unless it has to be resampled
+    raw_for_ica = raw.copy().resample(target_sfreq, verbose=False) if original_sfreq > target_sfreq else raw
+    base = os.path.splitext(os.path.basename(ip))[0]
+    out_folder = os.path.join(os.getcwd(), f"{base}_ica")
+    os.makedirs(out_folder, exist_ok=True)
     ica = mne.preprocessing.ICA(n_components=n_components, random_state=42, verbose=False)
     ica.fit(raw_for_ica)
     n_ics = ica.n_components_
     print(f"[ic] Fitted: {n_ics} components")
-    cleaned_raw = ica.apply(raw.copy())
-    base = os.path.splitext(os.path.basename(ip))[0]
-    out_folder = os.path.join(os.getcwd(), f"{base}_ica")
-    os.makedirs(out_folder, exist_ok=True)
+    cleaned_raw = ica.apply(raw)  # In place: the original Raw is not needed afterwards
     cleaned_fif = os.path.join(out_folder, f"{base}_ica_cleaned.fif")
     cleaned_raw.save(cleaned_fif, overwrite=True, verbose=False)
     print(f"[ic] Cleaned: {os.path.basename(cleaned_fif)}")
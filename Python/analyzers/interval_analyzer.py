@@ -1,5 +1,10 @@
 import polars as pl, numpy as np, sys, os
 
+def _rmssd(intervals: np.ndarray, buf: np.ndarray | None = None) -> float:
+    """RMSSD of an interval series; a float64 scratch buf (at least intervals.size - 1 long) receives the differences in place."""
+    d = np.diff(intervals) if buf is None else np.subtract(intervals[1:], intervals[:-1], out=buf[:intervals.size - 1])
+    return float(np.sqrt(np.mean(np.square(d, out=d if buf is not None else None, dtype=np.float64))))
+
 def analyze_intervals(ip: str, event_col: str | None = None, y_lim: float | None = None, 
                       y_label: str = 'Value (ms)', suffix: str = 'interval',
                       metrics_mode: str = 'auto') -> str:
@@ -19,21 +24,24 @@ def analyze_intervals(ip: str, event_col: str | None = None, y_lim: float | None
         Path to signal file
     """
     print(f"[interval] Interval analysis: {ip}")
-    df = pl.read_parquet(ip)
+    columns = list(pl.read_parquet_schema(ip))
     
-    if 'condition' not in df.columns or 'epoch_id' not in df.columns:
+    if 'condition' not in columns or 'epoch_id' not in columns:
         raise ValueError("Input must have 'condition' and 'epoch_id' columns")
     
     # Auto-detect event column
     if event_col is None:
         candidates = ['R_Peak_Sample', 'rpeaks', 'peaks', 'events', 'samples']
-        event_col = next((c for c in candidates if c in df.columns), None)
+        event_col = next((c for c in candidates if c in columns), None)
         if event_col is None:
             # Use first non-meta column
             meta_cols = ['time', 'sfreq', 'epoch_id', 'condition']
-            event_col = [c for c in df.columns if c not in meta_cols][0]
+            event_col = [c for c in columns if c not in meta_cols][0]
     
     print(f"[interval] Using event column: {event_col}")
+    # Read only the columns used below, with the event column typed as float64 once
+    df = pl.read_parquet(ip, columns=list(dict.fromkeys(c for c in ['condition', 'epoch_id', event_col, 'sfreq'] if c in columns)))
+    df = df.with_columns(pl.col(event_col).cast(pl.Float64))
     sfreq = float(df['sfreq'][0]) if 'sfreq' in df.columns else 1000.0
     
     base = os.path.splitext(os.path.basename(ip))[0]
@@ -43,30 +51,45 @@ def analyze_intervals(ip: str, event_col: str | None = None, y_lim: float | None
     conditions = sorted(df['condition'].unique().to_list())
     print(f"[interval] Processing {len(conditions)} conditions (sfreq={sfreq} Hz)")
     
+    # Sort once by (condition, epoch_id): conditions and epochs become contiguous index ranges located by
+    # binary search, replacing a filter per condition and per epoch
+    df = df.sort(['condition', 'epoch_id'], maintain_order=True)
+    events_all = df[event_col].to_numpy()
+    cond_col = df['condition'].to_numpy()
+    seg_starts = np.flatnonzero(df.select(pl.struct('condition', 'epoch_id').is_first_distinct()).to_series().to_numpy())
+    cond_keys = np.array(conditions, dtype=cond_col.dtype)
+    cond_lo, cond_hi = np.searchsorted(cond_col, cond_keys, side='left'), np.searchsorted(cond_col, cond_keys, side='right')
+    # One scratch buffer for the whole input (no epoch is longer than it): event differences and RMSSD's
+    # successive differences are written into it instead of allocating temporaries per epoch
+    scratch = np.empty(len(events_all), dtype=np.float64)
+    
     for idx, cond in enumerate(conditions):
-        cond_df = df.filter(pl.col('condition') == cond)
-        epoch_ids = cond_df['epoch_id'].unique().to_list()
+        lo, hi = cond_lo[idx], cond_hi[idx]
+        starts = seg_starts[np.searchsorted(seg_starts, lo):np.searchsorted(seg_starts, hi)]
         
         sdnn_per_epoch, rmssd_per_epoch = [], []
         
-        for eid in epoch_ids:
-            epoch_df = cond_df.filter(pl.col('epoch_id') == eid)
-            events = epoch_df[event_col].to_numpy()
+        for start, stop in zip(starts, np.append(starts[1:], hi)):
+            events = events_all[start:stop]
             
             if len(events) < 2:
                 continue
             
-            # Calculate inter-event intervals in milliseconds
-            intervals = np.diff(events) / sfreq * 1000.0
+            # Calculate inter-event intervals in milliseconds: differences are taken on the float64 event
+            # positions, the (small) intervals themselves are stored as float32; statistics accumulate in float64
+            diffs = np.subtract(events[1:], events[:-1], out=scratch[:len(events) - 1])
+            diffs /= sfreq
+            diffs *= 1000.0
+            intervals = diffs.astype(np.float32)
             
             if len(intervals) < 2:
                 continue
             
             # SDNN: Standard deviation of intervals
-            sdnn_per_epoch.append(float(np.std(intervals, ddof=1)))
+            sdnn_per_epoch.append(float(np.std(intervals, ddof=1, dtype=np.float64)))
             
             # RMSSD: Root mean square of successive differences
-            rmssd_per_epoch.append(float(np.sqrt(np.mean(np.diff(intervals) ** 2))))
+            rmssd_per_epoch.append(_rmssd(intervals, scratch))
         
         if not sdnn_per_epoch:
             print(f"[interval] Warning: {cond} has no valid epochs, skipping")
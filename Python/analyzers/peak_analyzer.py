@@ -1,5 +1,12 @@
 import polars as pl, numpy as np, sys, os
 
+# Peak index finders by method; unknown methods fall back to max_abs
+_PEAK_FINDERS = {
+    'max_abs': lambda d: np.argmax(np.abs(d)),
+    'max': np.argmax,
+    'min': np.argmin,
+}
+
 def analyze_peaks(ip: str, method: str = 'max_abs', time_window: str | None = None, 
                   y_lim: float | None = None, y_label: str = 'Amplitude', suffix: str = 'peak') -> str:
     """
@@ -38,13 +45,16 @@ def analyze_peaks(ip: str, method: str = 'max_abs', time_window: str | None = No
     out_folder = os.path.join(os.getcwd(), f"{base}_{suffix}")
     os.makedirs(out_folder, exist_ok=True)
     
+    find_peak = _PEAK_FINDERS.get(method, _PEAK_FINDERS['max_abs'])
+    has_time = 'time' in df.columns  # Loop-invariant: the per-condition frames share the input schema
+    
     print(f"[peak] Processing {len(conditions)} conditions, {len(ch_cols)} channels")
     
     for idx, cond in enumerate(conditions):
         cond_df = df.filter(pl.col('condition') == cond)
         
         # Average across epochs first (like ERP)
-        if 'time' in cond_df.columns:
+        if has_time:
             # Group by time, average across epochs
             avg_df = cond_df.group_by('time').agg([
                 pl.col(ch).mean().alias(ch) for ch in ch_cols
@@ -61,38 +71,24 @@ def analyze_peaks(ip: str, method: str = 'max_abs', time_window: str | None = No
         else:
             mask = np.ones(len(times), dtype=bool)
         
-        peak_results = []
-        for ch in ch_cols:
-            data = avg_df[ch].to_numpy()
-            masked_data = data[mask]
-            masked_times = times[mask]
-            
-            if len(masked_data) == 0:
-                continue
-            
-            # Find peak based on method
-            if method == 'max_abs':
-                peak_idx = np.argmax(np.abs(masked_data))
-            elif method == 'max':
-                peak_idx = np.argmax(masked_data)
-            elif method == 'min':
-                peak_idx = np.argmin(masked_data)
-            else:
-                peak_idx = np.argmax(np.abs(masked_data))
+        channels, latencies, amplitudes = [], [], []
+        # Window applied once for all channels; an empty window yields no peaks
+        masked_times = times[mask]
+        masked_block = avg_df.select(ch_cols).to_numpy()[mask] if len(masked_times) else None
+        for j, ch in enumerate(ch_cols if masked_block is not None else []):
+            masked_data = masked_block[:, j]
+            peak_idx = find_peak(masked_data)
             
-            peak_results.append({
-                'channel': ch,
-                'latency': float(masked_times[peak_idx]),
-                'amplitude': float(masked_data[peak_idx]),
-                'condition': str(cond)
-            })
+            channels.append(ch)
+            latencies.append(float(masked_times[peak_idx]))
+            amplitudes.append(float(masked_data[peak_idx]))
         
         # Output in plotter format
         output = pl.DataFrame({
             'condition': [str(cond)],
-            'x_data': [[r['channel'] for r in peak_results]],
-            'y_data': [[r['amplitude'] for r in peak_results]],
-            'latency': [[r['latency'] for r in peak_results]],
+            'x_data': [channels],
+            'y_data': [amplitudes],
+            'latency': [latencies],
             'plot_type': ['bar'],
             'x_label': ['Channel'],
             'y_label': [y_label],
@@ -101,11 +97,16 @@ def analyze_peaks(ip: str, method: str = 'max_abs', time_window: str | None = No
         
         out_path = os.path.join(out_folder, f"{base}_{suffix}{idx+1}.parquet")
         output.write_parquet(out_path)
-        print(f"[peak]   {cond}: {len(peak_results)} channels -> {os.path.basename(out_path)}")
+        print(f"[peak]   {cond}: {len(channels)} channels -> {os.path.basename(out_path)}")
         
         # Also save detailed per-channel results
         detail_path = os.path.join(out_folder, f"{base}_{suffix}{idx+1}_detail.parquet")
-        pl.DataFrame(peak_results).write_parquet(detail_path)
+        pl.DataFrame({
+            'channel': channels,
+            'latency': latencies,
+            'amplitude': amplitudes,
+            'condition': [str(cond)] * len(channels)
+        }).write_parquet(detail_path)
     
     signal_path = os.path.join(os.getcwd(), f"{base}_{suffix}.parquet")
     pl.DataFrame({
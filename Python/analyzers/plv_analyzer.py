@@ -1,7 +1,112 @@
-import polars as pl, numpy as np, sys, os, ast
+import polars as pl, numpy as np, sys, os, ast, multiprocessing
 from scipy.signal import hilbert, butter, filtfilt
 from numpy.typing import NDArray
 from typing import Any
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+def _plv_condition(cond_data: list[pl.DataFrame], stream_configs: list[dict[str, Any]], filters: list, stream_paths: list[str]) -> list[dict[str, Any]]:
+    """Compute all pairwise PLVs for one condition (module-level so it can run in a worker process)."""
+    epoch_ids = sorted(cond_data[0]['epoch_id'].unique().to_list())
+    
+    # Determine output labels (channels or stream pairs)
+    continuous_streams = [(i, cfg) for i, cfg in enumerate(stream_configs) if cfg['type'] == 'continuous']
+    event_streams = [(i, cfg) for i, cfg in enumerate(stream_configs) if cfg['type'] == 'event']
+    
+    # Per-epoch slices, filtered once per stream (a missing epoch yields an empty slice, as a filter would)
+    by_epoch = [{part['epoch_id'][0]: part for part in df.partition_by('epoch_id', maintain_order=True)} for df in cond_data]
+    empty = [df.clear() for df in cond_data]  # Built once: a .get() default is evaluated on every lookup
+    epoch_of = lambda idx, eid: by_epoch[idx].get(eid, empty[idx])
+    
+    def phase_of(idx: int, ch: str, eid: Any) -> NDArray[np.floating[Any]]:
+        """Band-passed instantaneous phase of one channel in one epoch."""
+        b, a = filters[idx]
+        return np.angle(hilbert(filtfilt(b, a, epoch_of(idx, eid)[ch].to_numpy())))
+    
+    # Build all pairwise PLVs between streams
+    plv_results = []
+    
+    # Continuous vs Event (e.g., EEG-HRV, EDA-HRV)
+    if len(continuous_streams) > 0 and len(event_streams) > 0:
+        evt_label = os.path.splitext(os.path.basename(stream_paths[event_streams[0][0]]))[0]
+        for cont_idx, cont_cfg in continuous_streams:
+            for ch in cont_cfg['channels']:
+                ch_plvs = []
+                
+                for eid in epoch_ids:
+                    # Get continuous signal phase
+                    cont_phase: NDArray[np.floating[Any]] = phase_of(cont_idx, ch, eid)
+                    time_axis: NDArray[np.float64] = epoch_of(cont_idx, eid)['time'].to_numpy()
+                    
+                    # Get event phase for each event stream
+                    for evt_idx, evt_cfg in event_streams:
+                        event_times: NDArray[np.float64] = epoch_of(evt_idx, eid)[evt_cfg['column']].to_numpy()
+                        
+                        # Build event phase signal
+                        evt_phase: NDArray[np.float64] = np.zeros_like(time_axis)
+                        
+                        for i, t in enumerate(time_axis):
+                            n_events: int = int(np.sum(event_times <= t))
+                            if n_events > 0 and n_events < len(event_times):
+                                prev: np.float64 = event_times[n_events-1]
+                                nxt: np.float64 = event_times[n_events]
+                                frac: np.float64 = (t - prev) / (nxt - prev)
+                                evt_phase[i] = 2 * np.pi * (n_events + frac)
+                        
+                        # Calculate PLV
+                        phase_diff: NDArray[np.floating[Any]] = cont_phase - evt_phase
+                        plv: float = float(np.abs(np.mean(np.exp(1j * phase_diff))))
+                        ch_plvs.append(plv)
+                
+                if ch_plvs:
+                    label = f"{ch}-{evt_label}"
+                    plv_results.append({
+                        'pair': label,
+                        'plv_mean': float(np.mean(ch_plvs)),
+                        'plv_sem': float(np.std(ch_plvs, ddof=1) / np.sqrt(len(ch_plvs)))
+                    })
+    
+    # Continuous vs Continuous (e.g., EEG-EDA)
+    if len(continuous_streams) >= 2:
+        for i, (idx1, cfg1) in enumerate(continuous_streams[:-1]):
+            for idx2, cfg2 in continuous_streams[i+1:]:
+                pair_plvs = {(ch1, ch2): [] for ch1 in cfg1['channels'] for ch2 in cfg2['channels']}
+                
+                for eid in epoch_ids:
+                    # Phases of this epoch only, shared by every channel pair and released before the next epoch
+                    phases1 = {ch1: phase_of(idx1, ch1, eid) for ch1 in cfg1['channels']}
+                    phases2 = {ch2: phase_of(idx2, ch2, eid) for ch2 in cfg2['channels']}
+                    
+                    for (ch1, ch2), plvs in pair_plvs.items():
+                        phase1: NDArray[np.floating[Any]] = phases1[ch1]
+                        phase2: NDArray[np.floating[Any]] = phases2[ch2]
+                        
+                        # Interpolate if different lengths due to different sampling rates
+                        if len(phase1) != len(phase2):
+                            from scipy.interpolate import interp1d
+                            if len(phase2) < len(phase1):
+                                x_old = np.linspace(0, 1, len(phase2))
+                                x_new = np.linspace(0, 1, len(phase1))
+                                phase2 = interp1d(x_old, phase2, kind='linear')(x_new)
+                            else:
+                                x_old = np.linspace(0, 1, len(phase1))
+                                x_new = np.linspace(0, 1, len(phase2))
+                                phase1 = interp1d(x_old, phase1, kind='linear')(x_new)
+                        
+                        # PLV
+                        pdiff: NDArray[np.floating[Any]] = phase1 - phase2
+                        plv_val: float = float(np.abs(np.mean(np.exp(1j * pdiff))))
+                        plvs.append(plv_val)
+                
+                for (ch1, ch2), plvs in pair_plvs.items():
+                    if plvs:
+                        plv_results.append({
+                            'pair': f"{ch1}-{ch2}",
+                            'plv_mean': float(np.mean(plvs)),
+                            'plv_sem': float(np.std(plvs, ddof=1) / np.sqrt(len(plvs)))
+                        })
+    
+    return plv_results
 
 def compute_plv(stream_paths: list[str], stream_configs: list[dict[str, Any]], output_name: str, y_lim: float | None = None) -> str:
     """
@@ -18,8 +123,9 @@ def compute_plv(stream_paths: list[str], stream_configs: list[dict[str, Any]], o
     for i, (path, cfg) in enumerate(zip(stream_paths, stream_configs)):
         print(f"[plv]   Stream {i+1}: {os.path.basename(path)} ({cfg['type']})")
     
-    # Load all streams
-    streams = [pl.read_parquet(path) for path in stream_paths]
+    # Load all streams, reading only the columns the PLV computation touches
+    needed = lambda cfg: ['condition', 'epoch_id'] + (['time', *cfg['channels']] if cfg['type'] == 'continuous' else [cfg['column']])
+    streams = [pl.read_parquet(path, columns=list(dict.fromkeys(needed(cfg)))) for path, cfg in zip(stream_paths, stream_configs)]
     
     workspace = os.getcwd()
     out_folder = os.path.join(workspace, f"{output_name}_plv")
@@ -39,109 +145,18 @@ def compute_plv(stream_paths: list[str], stream_configs: list[dict[str, Any]], o
         else:
             filters.append(None)
     
+    # Conditions are independent: compute them in a process pool (serial for a single condition).
+    # Workers are spawned, not forked: forking after polars has started its thread pool can deadlock.
+    cond_datas = [[df.filter(pl.col('condition') == cond) for df in streams] for cond in conditions]
+    worker = partial(_plv_condition, stream_configs=stream_configs, filters=filters, stream_paths=stream_paths)
+    if len(conditions) > 1:
+        with ProcessPoolExecutor(max_workers=min(len(conditions), os.cpu_count() or 1), mp_context=multiprocessing.get_context('spawn')) as ex:
+            all_results = list(ex.map(worker, cond_datas))
+    else:
+        all_results = [worker(cd) for cd in cond_datas]
+    
     # Process each condition
-    for idx, cond in enumerate(conditions):
-        cond_data = [df.filter(pl.col('condition') == cond) for df in streams]
-        epoch_ids = sorted(cond_data[0]['epoch_id'].unique().to_list())
-        
-        # Determine output labels (channels or stream pairs)
-        continuous_streams = [(i, cfg) for i, cfg in enumerate(stream_configs) if cfg['type'] == 'continuous']
-        event_streams = [(i, cfg) for i, cfg in enumerate(stream_configs) if cfg['type'] == 'event']
-        
-        # Build all pairwise PLVs between streams
-        plv_results = []
-        
-        # Continuous vs Event (e.g., EEG-HRV, EDA-HRV)
-        if len(continuous_streams) > 0 and len(event_streams) > 0:
-            for cont_idx, cont_cfg in continuous_streams:
-                for ch in cont_cfg['channels']:
-                    ch_plvs = []
-                    
-                    for eid in epoch_ids:
-                        # Get continuous signal phase
-                        signal: NDArray[np.float64] = cond_data[cont_idx].filter(pl.col('epoch_id') == eid)[ch].to_numpy()
-                        b, a = filters[cont_idx]
-                        filtered: NDArray[np.float64] = filtfilt(b, a, signal)  # type: ignore[assignment]
-                        analytic: NDArray[np.complex128] = hilbert(filtered)  # type: ignore[assignment]
-                        cont_phase: NDArray[np.floating[Any]] = np.angle(analytic)
-                        
-                        # Get event phase for each event stream
-                        for evt_idx, evt_cfg in event_streams:
-                            event_epoch = cond_data[evt_idx].filter(pl.col('epoch_id') == eid)
-                            event_times: NDArray[np.float64] = event_epoch[evt_cfg['column']].to_numpy()
-                            
-                            # Build event phase signal
-                            time_axis: NDArray[np.float64] = cond_data[cont_idx].filter(pl.col('epoch_id') == eid)['time'].to_numpy()
-                            evt_phase: NDArray[np.float64] = np.zeros_like(time_axis)
-                            
-                            for i, t in enumerate(time_axis):
-                                n_events: int = int(np.sum(event_times <= t))
-                                if n_events > 0 and n_events < len(event_times):
-                                    prev: np.float64 = event_times[n_events-1]
-                                    nxt: np.float64 = event_times[n_events]
-                                    frac: np.float64 = (t - prev) / (nxt - prev)
-                                    evt_phase[i] = 2 * np.pi * (n_events + frac)
-                            
-                            # Calculate PLV
-                            phase_diff: NDArray[np.floating[Any]] = cont_phase - evt_phase
-                            plv: float = float(np.abs(np.mean(np.exp(1j * phase_diff))))
-                            ch_plvs.append(plv)
-                    
-                    if ch_plvs:
-                        label = f"{ch}-{os.path.splitext(os.path.basename(stream_paths[event_streams[0][0]]))[0]}"
-                        plv_results.append({
-                            'pair': label,
-                            'plv_mean': float(np.mean(ch_plvs)),
-                            'plv_sem': float(np.std(ch_plvs, ddof=1) / np.sqrt(len(ch_plvs)))
-                        })
-        
-        # Continuous vs Continuous (e.g., EEG-EDA)
-        if len(continuous_streams) >= 2:
-            for i, (idx1, cfg1) in enumerate(continuous_streams[:-1]):
-                for idx2, cfg2 in continuous_streams[i+1:]:
-                    for ch1 in cfg1['channels']:
-                        for ch2 in cfg2['channels']:
-                            pair_plvs = []
-                            
-                            for eid in epoch_ids:
-                                # Signal 1
-                                sig1: NDArray[np.float64] = cond_data[idx1].filter(pl.col('epoch_id') == eid)[ch1].to_numpy()
-                                b1, a1 = filters[idx1]
-                                filt1: NDArray[np.float64] = filtfilt(b1, a1, sig1)  # type: ignore[assignment]
-                                anal1: NDArray[np.complex128] = hilbert(filt1)  # type: ignore[assignment]
-                                phase1: NDArray[np.floating[Any]] = np.angle(anal1)
-                                
-                                # Signal 2
-                                sig2: NDArray[np.float64] = cond_data[idx2].filter(pl.col('epoch_id') == eid)[ch2].to_numpy()
-                                b2, a2 = filters[idx2]
-                                filt2: NDArray[np.float64] = filtfilt(b2, a2, sig2)  # type: ignore[assignment]
-                                anal2: NDArray[np.complex128] = hilbert(filt2)  # type: ignore[assignment]
-                                phase2: NDArray[np.floating[Any]] = np.angle(anal2)
-                                
-                                # Interpolate if different lengths due to different sampling rates
-                                if len(phase1) != len(phase2):
-                                    from scipy.interpolate import interp1d
-                                    if len(phase2) < len(phase1):
-                                        x_old = np.linspace(0, 1, len(phase2))
-                                        x_new = np.linspace(0, 1, len(phase1))
-                                        phase2 = interp1d(x_old, phase2, kind='linear')(x_new)
-                                    else:
-                                        x_old = np.linspace(0, 1, len(phase1))
-                                        x_new = np.linspace(0, 1, len(phase2))
-                                        phase1 = interp1d(x_old, phase1, kind='linear')(x_new)
-                                
-                                # PLV
-                                pdiff: NDArray[np.floating[Any]] = phase1 - phase2
-                                plv_val: float = float(np.abs(np.mean(np.exp(1j * pdiff))))
-                                pair_plvs.append(plv_val)
-                            
-                            if pair_plvs:
-                                plv_results.append({
-                                    'pair': f"{ch1}-{ch2}",
-                                    'plv_mean': float(np.mean(pair_plvs)),
-                                    'plv_sem': float(np.std(pair_plvs, ddof=1) / np.sqrt(len(pair_plvs)))
-                                })
-        
+    for idx, (cond, plv_results) in enumerate(zip(conditions, all_results)):
         # Output
         if plv_results:
             result_df = pl.DataFrame(plv_results)
@@ -172,4 +187,4 @@ def compute_plv(stream_paths: list[str], stream_configs: list[dict[str, Any]], o
     print(f"[plv] Finished. Signal: {os.path.basename(signal_path)}")
     return signal_path
 
-if __name__ == '__main__': (lambda a: compute_plv(ast.literal_eval(a[1])['streams'], ast.literal_eval(a[1])['configs'], ast.literal_eval(a[1])['output_name'], float(a[2]) if len(a) > 2 and a[2] else None) if len(a) >= 2 else (print('Compute Phase Locking Value between streams. Plot-ready output.\n[plv] Usage: plv_analyzer.py <config_dict> [y_lim]'), sys.exit(1)))(sys.argv)
+if __name__ == '__main__': (lambda a: (lambda cfg: compute_plv(cfg['streams'], cfg['configs'], cfg['output_name'], float(a[2]) if len(a) > 2 and a[2] else None))(ast.literal_eval(a[1])) if len(a) >= 2 else (print('Compute Phase Locking Value between streams. Plot-ready output.\n[plv] Usage: plv_analyzer.py <config_dict> [y_lim]'), sys.exit(1)))(sys.argv)
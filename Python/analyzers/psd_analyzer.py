@@ -17,66 +17,79 @@ def compute_psd(ip: str, bands: dict, channels: list | None = None, y_lim: float
     if channels:
         ch_names = [c for c in ch_names if c in channels]
     
-    # Detect sampling frequency from time column
-    first_epoch = df.filter(pl.col('epoch_id') == df['epoch_id'][0])
-    times = first_epoch['time'].to_numpy()
+    # Split into epochs in a single pass instead of one full-frame filter per epoch
+    epoch_dfs = df.partition_by('epoch_id', maintain_order=True)
+    
+    # Detect sampling frequency from the first epoch's time column
+    times = epoch_dfs[0]['time'].to_numpy()
     dt = float(times[1]) - float(times[0]) if len(times) > 1 else 1.0/256.0
     sfreq = 1.0 / dt
     
-    epoch_ids = df['epoch_id'].unique().to_list()
-    conditions = [str(df.filter(pl.col('epoch_id') == eid)['condition'][0]) for eid in epoch_ids]
+    epoch_ids = [str(e['epoch_id'][0]) for e in epoch_dfs]
+    conditions = [str(e['condition'][0]) for e in epoch_dfs]
     
     print(f"[psd] Data: {len(epoch_ids)} epochs, {len(ch_names)} ch, {sfreq:.1f} Hz, Bands: {list(bands.keys())}")
     
-    # Compute PSD per epoch per channel using scipy
-    results = []
+    # Compute PSD per epoch for all channels at once; collect results column-wise
     nperseg = min(256, len(times))
+    band_items = list(bands.items())
+    n_ch, n_bands = len(ch_names), len(band_items)
+    cond_col, eid_col, power_col = [], [], []
     
-    for ep_idx, eid in enumerate(epoch_ids):
-        epoch_df = df.filter(pl.col('epoch_id') == eid)
-        cond = conditions[ep_idx]
+    for ep_idx, (eid, epoch_df) in enumerate(zip(epoch_ids, epoch_dfs)):
+        freqs, psd = signal.welch(epoch_df.select(ch_names).to_numpy().T, fs=sfreq, nperseg=nperseg, axis=-1)
+        
+        # (channels, bands) power block; empty bands yield 0.0 as before
+        band_power = np.zeros((n_ch, n_bands))
+        for b, (band_name, (fmin, fmax)) in enumerate(band_items):
+            mask = (freqs >= fmin) & (freqs <= fmax)
+            if mask.any(): band_power[:, b] = psd[:, mask].mean(axis=1)
         
-        for ch in ch_names:
-            data = epoch_df[ch].to_numpy()
-            freqs, psd = signal.welch(data, fs=sfreq, nperseg=nperseg)
-            
-            for band_name, (fmin, fmax) in bands.items():
-                mask = (freqs >= fmin) & (freqs <= fmax)
-                power = float(np.mean(psd[mask])) if mask.any() else 0.0
-                results.append({
-                    'condition': cond,
-                    'epoch_id': eid,
-                    'channel': ch,
-                    'band': band_name,
-                    'power': power
-                })
+        cond_col.append(conditions[ep_idx])
+        eid_col.append(eid)
+        power_col.append(band_power.ravel())
     
     base = os.path.splitext(os.path.basename(ip))[0]
     out_folder = os.path.join(os.getcwd(), f"{base}_psd")
     os.makedirs(out_folder, exist_ok=True)
     
-    result_df = pl.DataFrame(results)
+    n_rows = n_ch * n_bands
+    result_df = pl.DataFrame({
+        'condition': np.repeat(cond_col, n_rows),
+        'epoch_id': np.repeat(eid_col, n_rows),
+        'channel': np.tile(np.repeat(ch_names, n_bands), len(eid_col)),
+        'band': np.tile([name for name, _ in band_items], n_ch * len(eid_col)),
+        'power': np.concatenate(power_col) if power_col else np.zeros(0)
+    }).with_columns(pl.col(['condition', 'epoch_id', 'channel', 'band']).cast(pl.Categorical))  # Highly repetitive labels
     conds = sorted(result_df['condition'].unique().to_list())
     band_names = sorted(bands.keys())
     
+    # Condition groups from one hash partition rather than a full-frame filter per condition
+    cond_parts = result_df.partition_by('condition', as_dict=True)
+    
     print(f"[psd] Processing {len(conds)} conditions")
     
     for idx, cond in enumerate(conds):
-        cond_data = result_df.filter(pl.col('condition') == cond)
+        cond_data = cond_parts[(cond,)]
         
         # Raw data per channel/band
         raw_df = cond_data.group_by(['channel', 'band']).agg([
             pl.col('power').mean().alias('power'),
             pl.col('power').std().alias('power_std'),
             pl.col('power').count().alias('n_epochs')
-        ]).with_columns(pl.lit(cond).alias('condition'))
+        ]).with_columns(pl.col(['power', 'power_std']).cast(pl.Float32), pl.col(['channel', 'band']).cast(pl.String),  # Published schema keeps String labels
+                        pl.lit(cond).alias('condition'))
         
         raw_df.write_parquet(os.path.join(out_folder, f"{base}_psd{idx+1}.parquet"))
         
         # Plotter format (aggregated across channels)
-        band_powers = [float(np.mean(cond_data.filter(pl.col('band') == b)['power'].to_numpy())) for b in band_names]
-        n_vals = [len(cond_data.filter(pl.col('band') == b)) for b in band_names]
-        band_sems = [float(np.std(cond_data.filter(pl.col('band') == b)['power'].to_numpy(), ddof=1) / np.sqrt(n)) if n > 1 else 0.0 for b, n in zip(band_names, n_vals)]
+        band_stats = {r['band']: r for r in cond_data.group_by('band').agg([
+            pl.col('power').mean().alias('mean'),
+            pl.col('power').std().alias('std'),
+            pl.col('power').count().alias('n')
+        ]).to_dicts()}
+        band_powers = [float(band_stats[b]['mean']) for b in band_names]
+        band_sems = [float(band_stats[b]['std'] / np.sqrt(band_stats[b]['n'])) if band_stats[b]['n'] > 1 else 0.0 for b in band_names]
         
         pl.DataFrame({
             'condition': [cond],
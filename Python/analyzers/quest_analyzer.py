@@ -5,8 +5,16 @@ parse_param = lambda s: s if not isinstance(s, str) else (ast.literal_eval(open(
 flatten = lambda p: [x for el in p for x in (flatten(el) if isinstance(el, list) else [el])]
 
 # Tree navigation
+_prop_cache: dict = {}  # (id(node), key) -> resolved value; cleared at the start of each analyze() run
+
 def get_prop(n, k):
-    """Get property k from node n (checks entries, then recurses into structural children)."""
+    """Get property k from node n (checks entries, then recurses into structural children). Memoized per run."""
+    ck = (id(n), k)
+    if ck in _prop_cache: return _prop_cache[ck]
+    _prop_cache[ck] = v = _find_prop(n, k)
+    return v
+
+def _find_prop(n, k):
     for c in n.get('children', []):
         if c.get('entry') == k: return c.get('value')
     for c in n.get('children', []):
@@ -50,6 +58,7 @@ def get_pos(n, x_pos_key, fallback_keys):
 
 def analyze(ip, param_str, out_prefix):
     print(f"[quest] Processing: {ip}")
+    _prop_cache.clear()  # Node ids are only stable while this run's tree is alive
     root = pl.read_parquet(ip)['data'][0]; param = flatten(parse_param(param_str))
     if not isinstance(param[-1], dict): raise RuntimeError('Last param must be dict')
     inner = param[-1]; d_key = inner.get('data')
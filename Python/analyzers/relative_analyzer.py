@@ -1,4 +1,4 @@
-import polars as pl, sys, os
+import polars as pl, numpy as np, sys, os
 
 def relative_normalize(ip: str, baseline_cond: str = 'NEU', y_lim: float | None = None) -> str:
     """Convert concatenated analyzer output to relative change from baseline condition.
@@ -48,14 +48,14 @@ def relative_normalize(ip: str, baseline_cond: str = 'NEU', y_lim: float | None
     print(f"[relative] Baseline values: {[f'{v:.2f}' for v in baseline_values]}")
     
     # Convert each condition's values to relative change from baseline (baseline subtracted)
+    # Baseline as an array once; positions beyond its length fall back to its first value
+    baseline_arr = np.asarray(baseline_values, dtype=float)
     def to_relative(values, errors, baseline):
-        rel_values = []
-        rel_errors = []
-        for i, (v, e) in enumerate(zip(values, errors)):
-            base = baseline[i] if i < len(baseline) else baseline[0]
-            rel_values.append(v - base)  # Simple subtraction, not percentage
-            rel_errors.append(e)  # Keep original error
-        return rel_values, rel_errors
+        n = min(len(values), len(errors))
+        idx = np.arange(n)
+        base = np.where(idx < len(baseline), baseline[np.minimum(idx, len(baseline) - 1)], baseline[0]) if n else baseline[:0]
+        # Simple subtraction, not percentage; original errors are kept
+        return (np.asarray(values[:n], dtype=float) - base).tolist(), list(errors[:n])
     
     new_y_data = []
     new_y_var = []
@@ -64,7 +64,7 @@ def relative_normalize(ip: str, baseline_cond: str = 'NEU', y_lim: float | None
         # Skip the baseline condition (it would be all zeros)
         if i == baseline_idx:
             continue
-        rel_vals, rel_errs = to_relative(values, errors, baseline_values)
+        rel_vals, rel_errs = to_relative(values, errors, baseline_arr)
         new_y_data.append(rel_vals)
         new_y_var.append(rel_errs)
         new_labels.append(label)
@@ -17,37 +17,33 @@ def analyze_waveform(ip: str, y_lim: float | None = None, y_label: str = 'Mean a
         Path to signal file
     """
     print(f"[waveform] Waveform analysis: {ip}")
-    df = pl.read_parquet(ip)
+    columns = list(pl.read_parquet_schema(ip))
     
-    if 'condition' not in df.columns or 'epoch_id' not in df.columns:
+    if 'condition' not in columns or 'epoch_id' not in columns:
         raise ValueError("Input must have 'condition' and 'epoch_id' columns (flat epoched format)")
     
     # Auto-detect signal column
-    signal_col = [c for c in df.columns if c not in ['time', 'sfreq', 'epoch_id', 'condition']][0]
-    conditions = sorted(df['condition'].unique().to_list())
+    signal_col = [c for c in columns if c not in ['time', 'sfreq', 'epoch_id', 'condition']][0]
     
     base = os.path.splitext(os.path.basename(ip))[0]
     out_folder = os.path.join(os.getcwd(), f"{base}_{suffix}")
     os.makedirs(out_folder, exist_ok=True)
     
-    print(f"[waveform] Processing {len(conditions)} conditions, signal column: {signal_col}")
-    
-    for idx, cond in enumerate(conditions):
-        cond_df = df.filter(pl.col('condition') == cond)
-        
-        # Compute relative time within each epoch
-        cond_df = cond_df.with_columns([
-            (pl.col('time') - pl.col('time').min().over('epoch_id')).alias('relative_time')
-        ])
-        
-        # Average across epochs with SEM, then downsample
-        result = cond_df.group_by('relative_time').agg([
+    # One lazy pipeline for all conditions: relative time within each epoch, average across epochs
+    # with SEM, then keep every Nth point per condition
+    results = (pl.scan_parquet(ip).select(['condition', 'epoch_id', 'time', signal_col])
+        .with_columns((pl.col('time') - pl.col('time').min().over(['condition', 'epoch_id'])).alias('relative_time'))
+        .group_by(['condition', 'relative_time']).agg([
             pl.col(signal_col).mean().alias('mean_signal'),
             (pl.col(signal_col).std() / pl.col(signal_col).count().sqrt()).alias('sem_signal')
-        ]).sort('relative_time').with_row_index().filter(
-            pl.col('index') % downsample == 0
-        ).drop('index')
-        
+        ]).sort(['condition', 'relative_time'])
+        .filter(pl.int_range(pl.len()).over('condition') % downsample == 0)
+        .collect()).partition_by('condition', maintain_order=True)
+    conditions = [r['condition'][0] for r in results]
+    
+    print(f"[waveform] Processing {len(conditions)} conditions, signal column: {signal_col}")
+    
+    for idx, (cond, result) in enumerate(zip(conditions, results)):
         # Output format for plotter with error bands
         output = pl.DataFrame({
             'condition': [str(cond)],
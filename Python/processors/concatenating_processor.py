@@ -1,9 +1,11 @@
-import polars as pl, sys, os, re
+import polars as pl, sys, os, re, hashlib
+
+_PID_RE = re.compile(r'^([A-Za-z]+_\d+)')
 
 def extract_pid(filepath: str) -> str:
     """Extract participant ID from filepath (pattern like EV_002 or P001)."""
     basename = os.path.basename(filepath)
-    match = re.match(r'^([A-Za-z]+_\d+)', basename)
+    match = _PID_RE.match(basename)
     return match.group(1) if match else ''
 
 def concat_generic(files: list[str], conds: list[str]) -> pl.DataFrame:
@@ -50,15 +52,35 @@ def concat_generic(files: list[str], conds: list[str]) -> pl.DataFrame:
     
     return pl.DataFrame([{**metadata_fields, **aggregated}])
 
+def inputs_fingerprint(files: list[str], labels: list[str]) -> str:
+    """Hash of input paths, sizes, mtimes and labels; identical inputs give an identical fingerprint."""
+    h = hashlib.blake2b(digest_size=16)
+    for f, lab in zip(files, labels):
+        st = os.stat(f)
+        h.update(f"{os.path.abspath(f)}|{st.st_size}|{st.st_mtime_ns}|{lab}\n".encode())
+    return h.hexdigest()
+
+def _fp_matches(fp_path: str, fp: str) -> bool:
+    """True when the fingerprint sidecar exists and records fp."""
+    if not os.path.exists(fp_path): return False
+    with open(fp_path) as f: return f.read() == fp
+
+def write_concat(files: list[str], labels: list[str], out_path: str) -> None:
+    """Concatenate and write, skipping the work when out_path was built from the same inputs last run."""
+    fp, fp_path = inputs_fingerprint(files, labels), f"{out_path}.fp"
+    if os.path.exists(out_path) and _fp_matches(fp_path, fp):
+        print(f"[concatenating] Inputs unchanged, reusing {out_path}"); return
+    concat_generic(files, labels).write_parquet(out_path)
+    with open(fp_path, 'w') as f: f.write(fp)
+
 if __name__ == '__main__': (lambda a:
     (lambda items, out_base: (
         (lambda files, labels: (
-            (lambda pid, out_path: (
-                concat_generic(files, labels).write_parquet(out_path),
+            (lambda pid: (lambda out_path: (
+                write_concat(files, labels, out_path),
                 print(f"[concatenating] Concatenated {len(files)} files -> {out_path}"),
                 print(out_path)
-            ))(extract_pid(files[0]) if files else '', 
-               os.path.join(os.getcwd(), f"{extract_pid(files[0]) + '_' if files and extract_pid(files[0]) else ''}{out_base}.parquet"))
+            ))(os.path.join(os.getcwd(), f"{pid + '_' if pid else ''}{out_base}.parquet")))(extract_pid(files[0]) if files else '')
         ))([p.split(':',1)[1] for p in items] if ':' in items[0] else items, 
            [p.split(':',1)[0] for p in items] if ':' in items[0] else [f"cond{i+1}" for i in range(len(items))])
     ))(a[1:-1], a[-1]) if len(a) >= 3 else (print(f"Aggregate multiple condition parquets into single plot-ready output.\n[concatenating] Usage: python {a[0]} <path1> <path2> ... <out_basename> OR <label1:path1> <label2:path2> ... <out_basename>"), sys.exit(1))
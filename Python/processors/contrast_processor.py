@@ -13,39 +13,52 @@ def contrast_process(ip: str, contrasts_str: str, output_suffix: str = 'contrast
     conditions = df['condition'].unique().to_list()
     print(f"[contrast] {len(channels)} channels, {len(contrasts)} contrasts: {list(contrasts.keys())}")
     
-    results = []
-    for name, weights in contrasts.items():
-        for ch in channels:
-            ch_data = df.filter(pl.col('channel') == ch)
-            
-            # Compute contrast value: sum of weighted betas
-            contrast_val = 0.0
-            contrast_var = 0.0
-            for cond in conditions:
-                weight = weights.get(cond, 0)
-                if weight != 0:
-                    cond_row = ch_data.filter(pl.col('condition') == cond)
-                    if len(cond_row) > 0:
-                        beta = float(cond_row['beta'][0])
-                        se = float(cond_row['se'][0])
-                        contrast_val += weight * beta
-                        contrast_var += (weight ** 2) * (se ** 2)
-            
-            contrast_se = float(np.sqrt(contrast_var))
-            contrast_t = float(contrast_val / contrast_se) if contrast_se > 0 else 0.0
-            
-            results.append({
-                'channel': ch,
-                'contrast': name,
-                'value': contrast_val,
-                'se': contrast_se,
-                'tvalue': contrast_t
-            })
+    # Validate contrast conditions once; contrasts matching no condition are skipped with one warning
+    cond_set = set(conditions)
+    unknown = sorted({k for weights in contrasts.values() for k in weights if k not in cond_set})
+    if unknown: print(f"[contrast] Warning: Unknown condition(s) in contrasts ignored: {unknown}")
+    contrasts = {name: {k: v for k, v in weights.items() if k in cond_set} for name, weights in contrasts.items()}
+    skipped = [name for name, weights in contrasts.items() if not weights]
+    if skipped: print(f"[contrast] Warning: Skipping contrast(s) without matching conditions: {skipped}")
+    contrasts = {name: weights for name, weights in contrasts.items() if weights}
+    if not contrasts: print("[contrast] No valid contrasts, passing through"); return ip
+    
+    # Only conditions referenced by some contrast enter the matrices; filter the table once
+    contrast_conds = set().union(*contrasts.values())
+    conditions = [cond for cond in conditions if cond in contrast_conds]
+    df = df.filter(pl.col('condition').is_in(conditions))
+    
+    # Channel x condition matrices of betas and SEs (missing rows contribute nothing)
+    ch_pos = {ch: i for i, ch in enumerate(channels)}
+    cond_pos = {cond: j for j, cond in enumerate(conditions)}
+    rows = np.array([ch_pos[ch] for ch in df['channel'].to_list()], dtype=int)
+    cols = np.array([cond_pos[cond] for cond in df['condition'].to_list()], dtype=int)
+    betas, ses = np.zeros((len(channels), len(conditions))), np.zeros((len(channels), len(conditions)))
+    betas[rows, cols] = df['beta'].to_numpy()
+    ses[rows, cols] = df['se'].to_numpy()
+    
+    # Contrast x condition weight matrix; each contrast covers all channels in one product
+    names = list(contrasts.keys())
+    W = np.array([[float(contrasts[name].get(cond, 0)) for cond in conditions] for name in names]).reshape(len(names), len(conditions))
+    values, contrast_se = np.zeros((len(channels), len(names))), np.zeros((len(channels), len(names)))
+    for k, w in enumerate(W):
+        nz = w != 0  # Zero-weight conditions are skipped entirely (as before)
+        values[:, k] = betas[:, nz] @ w[nz]
+        contrast_se[:, k] = np.sqrt((ses[:, nz] ** 2) @ (w[nz] ** 2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tvalues = np.where(contrast_se > 0, values / contrast_se, 0.0)
+    
+    result_df = pl.DataFrame({
+        'channel': channels * len(names),
+        'contrast': [name for name in names for _ in channels],
+        'value': values.T.ravel(),
+        'se': contrast_se.T.ravel(),
+        'tvalue': tvalues.T.ravel()
+    })
     
-    result_df = pl.DataFrame(results)
     base, out_file = os.path.splitext(os.path.basename(ip))[0], f"{os.path.splitext(os.path.basename(ip))[0]}_{output_suffix}.parquet"
     result_df.write_parquet(out_file)
-    print(f"[contrast] Output: {out_file} ({len(results)} rows)")
+    print(f"[contrast] Output: {out_file} ({len(result_df)} rows)")
     return out_file
 
 if __name__ == '__main__': (lambda a: contrast_process(a[1], a[2], a[3] if len(a) > 3 else 'contrast') if len(a) >= 3 else (print("[contrast] Compute linear contrasts (weighted sums) from OLS betas.\nUsage: contrast_processor.py <ols.parquet> <contrasts_dict> [suffix=contrast]\nExample: contrast_processor.py data_ols.parquet \"{'A-B': {'A': 1, 'B': -1}}\""), sys.exit(1)))(sys.argv)
@@ -4,6 +4,10 @@ from decimal import Decimal
 
 warnings.filterwarnings('ignore', message='.*does not conform to MNE naming conventions.*')
 
+# Epoch tables repeat condition/epoch_id per sample: the writer dictionary-encodes those strings, and
+# zstd level 1 compresses as well as the default level on float channel data while writing faster
+_PARQUET_OPTS = {'compression': 'zstd', 'compression_level': 1}
+
 def _epoch_mne(raw, events: Dict[str, List[Tuple[float, float]]], data_path: str, rec_start: float = 0.0, event_sfreq: float = None) -> str:
     import mne
     
@@ -43,24 +47,23 @@ def _epoch_mne(raw, events: Dict[str, List[Tuple[float, float]]], data_path: str
         convert = lambda t: int(t * data_sfreq)
         print(f"[epoching] Events: seconds")
     
-    # Build MNE events array
-    event_id, event_counter, event_list = {}, 1, []
-    for condition, pairs in sorted(events.items()):
-        if condition not in event_id:
-            event_id[condition] = event_counter
-            event_counter += 1
-        for start, stop in pairs:
-            sample = convert(start)
-            if 0 <= sample < max_samples:
-                event_list.append([sample, 0, event_id[condition]])
-            else:
-                print(f"[epoching] Warning: {condition} epoch at sample {sample} out of range (0-{max_samples})")
-    
-    if not event_list:
+    # Build MNE events array directly from numpy arrays (no intermediate list of rows)
+    event_id = {cond: i + 1 for i, cond in enumerate(sorted(events.keys()))}
+    samples = np.array([convert(start) for cond in event_id for start, _ in events[cond]], dtype=int)
+    codes = np.array([event_id[cond] for cond in event_id for _ in events[cond]], dtype=int)
+    valid = (samples >= 0) & (samples < max_samples)
+    id_to_cond = {v: k for k, v in event_id.items()}
+    # One summary line per problem instead of one line per event
+    per_cond = lambda c: ', '.join(f"{id_to_cond[k]}: {n}" for k, n in zip(*np.unique(c, return_counts=True)))
+    if not valid.all():
+        print(f"[epoching] Warning: {(~valid).sum()} epoch(s) out of range (0-{max_samples}) ({per_cond(codes[~valid])})")
+    
+    if not valid.any():
         print(f"[epoching] Error: No valid events")
         return ""
     
-    mne_events = np.array(sorted(event_list, key=lambda x: x[0]), dtype=int)
+    order = np.argsort(samples[valid], kind='stable')
+    mne_events = np.column_stack([samples[valid], np.zeros(valid.sum(), dtype=int), codes[valid]])[order]
     
     # Calculate epoch duration from first pair
     first_start, first_stop = events[sorted(events.keys())[0]][0]
@@ -69,12 +72,9 @@ def _epoch_mne(raw, events: Dict[str, List[Tuple[float, float]]], data_path: str
     print(f"[epoching] Epoching: 0-{tmax:.1f}s, {len(mne_events)} valid events")
     
     # Check which epochs might be dropped due to data boundary
-    for evt in mne_events:
-        sample, _, cond_id = evt
-        end_sample = sample + int(tmax * raw.info['sfreq'])
-        if end_sample > max_samples:
-            cond_name = [k for k, v in event_id.items() if v == cond_id][0]
-            print(f"[epoching] Warning: {cond_name} epoch at sample {sample} will be truncated (end {end_sample} > {max_samples})")
+    truncated = mne_events[:, 0] + int(tmax * raw.info['sfreq']) > max_samples
+    if truncated.any():
+        print(f"[epoching] Warning: {truncated.sum()} epoch(s) will be truncated (end > {max_samples}) ({per_cond(mne_events[truncated, 2])})")
     
     # Create and flatten epochs
     epochs_obj = mne.Epochs(raw, mne_events, event_id=event_id, tmin=0.0, tmax=tmax, 
@@ -87,24 +87,28 @@ def _epoch_mne(raw, events: Dict[str, List[Tuple[float, float]]], data_path: str
         dropped = len(mne_events) - len(epochs_obj)
         # Count epochs per condition
         created_counts = {cond: len(epochs_obj[cond]) for cond in event_id.keys()}
-        requested_counts = {cond: sum(1 for e in mne_events if e[2] == event_id[cond]) for cond in event_id.keys()}
+        requested = np.bincount(mne_events[:, 2], minlength=len(event_id) + 1)
+        requested_counts = {cond: int(requested[event_id[cond]]) for cond in event_id.keys()}
         for cond in event_id.keys():
             if created_counts[cond] < requested_counts[cond]:
                 print(f"[epoching] Warning: {cond} lost {requested_counts[cond] - created_counts[cond]} epoch(s) (had {requested_counts[cond]}, got {created_counts[cond]})")
     
-    dfs = []
+    # One frame per condition built from the (epochs, channels, times) array, concatenated once
+    dfs, times = [], epochs_obj.times
     for cond in sorted(event_id.keys()):
-        for idx, epoch_data in enumerate(epochs_obj[cond].get_data()):
-            dfs.append(pl.DataFrame({
-                'condition': [cond] * len(epochs_obj.times),
-                'epoch_id': [f"{cond}_{idx}"] * len(epochs_obj.times),
-                'time': epochs_obj.times,
-                **{ch: epoch_data[i, :] for i, ch in enumerate(raw.ch_names)}
-            }))
+        data = epochs_obj[cond].get_data()
+        if len(data) == 0: continue
+        dfs.append(pl.DataFrame({
+            'condition': [cond] * (len(data) * len(times)),
+            'epoch_id': np.repeat([f"{cond}_{idx}" for idx in range(len(data))], len(times)),
+            'time': np.tile(times, len(data)),
+            **{ch: data[:, i, :].ravel() for i, ch in enumerate(raw.ch_names)}
+        }))
     
     out = f"{os.path.splitext(os.path.basename(data_path))[0]}_epochs.parquet"
-    (pl.concat(dfs) if dfs else pl.DataFrame()).write_parquet(out)
-    print(f"[epoching] Output: {out} ({len(pl.concat(dfs)) if dfs else 0} rows)")
+    result = pl.concat(dfs) if dfs else pl.DataFrame()
+    result.write_parquet(out, **_PARQUET_OPTS)
+    print(f"[epoching] Output: {out} ({len(result)} rows)")
     return out
 
 def epoch_and_flatten(data_path: str, events_path: str, orig_path: str | None = None) -> str:
@@ -153,25 +157,19 @@ def epoch_and_flatten(data_path: str, events_path: str, orig_path: str | None =
     
     print(f"[epoching] Time ranges: data={data_max:.1f}, events={event_max:.1f}, scales: {scale_data}×{scale_event}")
     
+    # Slice each epoch with a filter and stamp its labels as literals (no round trip through Python lists)
+    t = pl.col(time_col) * scale_data
     dfs = [
-        pl.DataFrame({
-            'condition': [c] * len(arr),
-            'epoch_id': [f"{c}_{i}"] * len(arr),
-            time_col: [r[0] for r in arr],
-            **{data_cols[j]: [r[j+1] for r in arr] for j in range(len(data_cols))}
-        })
+        seg.select(pl.lit(c).alias('condition'), pl.lit(f"{c}_{i}").alias('epoch_id'), time_col, *data_cols)
         for c, pairs in events.items()
-        for i, arr in enumerate([
-            df.filter((pl.col(time_col) * scale_data >= st / scale_event) & 
-                     (pl.col(time_col) * scale_data <= sp / scale_event))
-            .select([time_col] + data_cols).to_numpy().tolist() 
-            for st, sp in pairs
-        ]) if arr
+        for i, seg in enumerate([df.filter((t >= st / scale_event) & (t <= sp / scale_event)) for st, sp in pairs])
+        if len(seg)
     ]
     
     out = f"{os.path.splitext(os.path.basename(data_path))[0]}_epochs.parquet"
-    (pl.concat(dfs) if dfs else pl.DataFrame()).write_parquet(out)
-    print(f"[epoching] Output: {out} ({len(pl.concat(dfs)) if dfs else 0} rows)")
+    result = pl.concat(dfs) if dfs else pl.DataFrame()
+    result.write_parquet(out, **_PARQUET_OPTS)
+    print(f"[epoching] Output: {out} ({len(result)} rows)")
     return out
 
 if __name__ == '__main__': (lambda a:
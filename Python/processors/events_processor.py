@@ -1,15 +1,23 @@
 import polars as pl, fnmatch, sys, os, ast
+from functools import singledispatch
+from collections import Counter
 
 safe_str = lambda x: str(x) if x is not None else ''
 trig_to_str = lambda val: str(int(float(val)))  # Convert float triggers (e.g., 1.0) to string integers (e.g., '1')
 
+# Tree walk dispatched on node type (one MRO lookup per node instead of an isinstance chain)
+@singledispatch
 def walk(node, parent=None):
-    if isinstance(node, dict):
-        if 'entry' in node and 'value' in node: yield (node, parent)
-        if 'children' in node:
-            for child in node['children']: yield from walk(child, node)
-    elif isinstance(node, list):
-        for item in node: yield from walk(item, parent)
+    return iter(())
+
+@walk.register(dict)
+def _(node, parent=None):
+    if 'entry' in node and 'value' in node: yield (node, parent)
+    for child in node.get('children', ()): yield from walk(child, node)
+
+@walk.register(list)
+def _(node, parent=None):
+    for item in node: yield from walk(item, parent)
 
 
 
@@ -84,10 +92,11 @@ if __name__ == '__main__': (lambda a:
                     (lambda offset: (
                         (lambda epochs: (
                             print(f"[events] Extracted {len(pairs)} epoch pairs from tree"),
-                            [print(f"[events]   {c}: {len([p for p in pairs if p[0] == c])} epochs") for c in sorted(set(p[0] for p in pairs))],
+                            # Per-condition counts for the log lines come from one Counter pass, not a scan per condition
+                            [print(f"[events]   {c}: {n} epochs") for c, n in sorted(Counter(p[0] for p in pairs).items())],
                             print(f"[events] Found {sum(len(v) for v in rec_map.values())} triggers in recording"),
                             print(f"[events] Global offset: {offset:.1f} time units"),
-                            print(f"[events] Aligned {len(epochs)} epochs: {', '.join(f'{c}({sum(1 for cond,_,_ in epochs if cond==c)})' for c in sorted(set(cond for cond,_,_ in epochs)))}"),
+                            print(f"[events] Aligned {len(epochs)} epochs: {', '.join(f'{c}({n})' for c, n in sorted(Counter(cond for cond, _, _ in epochs).items()))}"),
                             (lambda out_dir: (
                                 pl.DataFrame({'data': [{c: [(st, sp) for cond, st, sp in epochs if cond == c] for c in sorted(set(cond for cond, _, _ in epochs))}]}).write_parquet(f"{out_dir}/{os.path.splitext(os.path.basename(a[1]))[0]}_events.parquet"),
                                 print(f"[events] Output: {out_dir}/{os.path.splitext(os.path.basename(a[1]))[0]}_events.parquet")
@@ -96,7 +105,7 @@ if __name__ == '__main__': (lambda a:
                     ))(global_offset(pairs, rec_map))
                 ))(build_rec_map(rec_df, set([t for p in pairs for t in (p[1], p[3])]), tree_time_ref))
             ))(pairs[0][2] if pairs else 0)
-        ))(extract_start_stop_pairs(tree, pats)) if extract_start_stop_pairs(tree, pats) else (print("[events] Error: No valid epoch pairs extracted"), sys.exit(1))
+        ) if pairs else (print("[events] Error: No valid epoch pairs extracted"), sys.exit(1)))(extract_start_stop_pairs(tree, pats))
     ))(ast.literal_eval(a[3]), pl.read_parquet(a[2])['data'][0], pl.read_parquet(a[1]))
     if len(a) == 4 else (print('[events] Extract event start/stop times from tree structure, align with triggers.\nUsage: events_processor.py <trigger.parquet> <tree.parquet> <patterns_list>'), sys.exit(1))
 )(sys.argv)
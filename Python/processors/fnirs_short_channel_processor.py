@@ -3,6 +3,9 @@ import polars as pl, numpy as np, sys, mne, re, os, warnings
 # Suppress MNE naming convention warnings
 warnings.filterwarnings('ignore', message='.*does not conform to MNE naming conventions.*')
 
+# Short-channel (nuisance regressor) name pattern, compiled once
+_SHORT_CH_RE = re.compile(r'(^s\d+\b)|short|_sd|_short', re.I)
+
 def apply_regression(ip: str, regr_type: str = 'short_channel', out: str | None = None) -> str:
     """
     Generic regression processor supporting multiple regression types.
@@ -25,7 +28,7 @@ def apply_regression(ip: str, regr_type: str = 'short_channel', out: str | None
         if regr_type == 'short_channel':
             # Short channel regression for fNIRS
             from mne_nirs.signal_enhancement import short_channel_regression
-            short_channels = [c for c in raw.ch_names if re.search(r'(^s\d+\b)|short|_sd|_short', c, re.I)]
+            short_channels = [c for c in raw.ch_names if _SHORT_CH_RE.search(c)]
             
             if not short_channels:
                 print(f"[fnirs_short_channel] Warning: No short channels detected, skipping regression")
@@ -70,7 +73,7 @@ def apply_regression(ip: str, regr_type: str = 'short_channel', out: str | None
     
     if regr_type == 'short_channel':
         from mne_nirs.signal_enhancement import short_channel_regression
-        short_channels = [c for c in data_cols if re.search(r'(^s\d+\b)|short|_sd|_short', c, re.I)]
+        short_channels = [c for c in data_cols if _SHORT_CH_RE.search(c)]
         
         if not short_channels:
             print(f"[fnirs_short_channel] Warning: No short channels detected, skipping regression")
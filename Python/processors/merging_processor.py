@@ -3,6 +3,8 @@ Column merge: SQL-style join on shared keys
 Plot merge: Combine x_data/y_data arrays from multiple sources per condition"""
 import polars as pl, numpy as np, sys, os, functools, re
 
+_PID_RE = re.compile(r'^([A-Za-z]+_\d+)')
+
 def merge_columns(ip: list[str], keys: list[str], output_suffix: str = 'merged') -> str:
     """Merge files by joining on shared key columns (SQL-style join)."""
     for f in ip:
@@ -39,7 +41,8 @@ def merge_plot_data(ip: list[str], prefixes: list[str] | None = None, output_suf
     def load_and_expand(filepath: str) -> list[dict]:
         """Load file and expand to list of per-condition dicts."""
         df = pl.read_parquet(filepath)
-        row = df.to_dicts()[0]
+        rows = df.to_dicts()  # Convert once; reused for the multi-row format
+        row = rows[0]
         
         # Check format: concatenated (has 'labels') vs multi-row (has 'condition')
         if 'labels' in row:
@@ -63,16 +66,20 @@ def merge_plot_data(ip: list[str], prefixes: list[str] | None = None, output_suf
             return result
         elif 'condition' in df.columns:
             # Multi-row format: one row per condition
-            return df.to_dicts()
+            return rows
         else:
             print(f"[merging] Error: File {filepath} has neither 'labels' nor 'condition' column")
             sys.exit(1)
     
-    # Load all files
+    # Load all files and index each source by condition once (first row per condition wins)
     all_data = [load_and_expand(f) for f in ip]
+    by_cond = [{} for _ in all_data]
+    for index, data in zip(by_cond, all_data):
+        for d in data:
+            index.setdefault(d['condition'], d)
     
     # Find common conditions
-    all_conds = [set(d['condition'] for d in data) for data in all_data]
+    all_conds = [set(index) for index in by_cond]
     common_conds = sorted(functools.reduce(lambda a, b: a & b, all_conds))
     if not common_conds:
         print(f"[merging] Warning: No common conditions, using union")
@@ -81,7 +88,7 @@ def merge_plot_data(ip: list[str], prefixes: list[str] | None = None, output_suf
     print(f"[merging] Conditions: {common_conds}")
     
     # Extract participant ID from first file
-    match = re.match(r'^([A-Za-z]+_\d+)', os.path.basename(ip[0]))
+    match = _PID_RE.match(os.path.basename(ip[0]))
     pid = match.group(1) + '_' if match else ''
     out_folder = os.path.join(os.getcwd(), f"{pid}{output_suffix}_data")
     os.makedirs(out_folder, exist_ok=True)
@@ -91,15 +98,14 @@ def merge_plot_data(ip: list[str], prefixes: list[str] | None = None, output_suf
         combined_x, combined_y, combined_var = [], [], []
         first_row = None
         
-        for data, prefix in zip(all_data, prefixes):
-            rows = [d for d in data if d['condition'] == cond]
-            if rows:
-                row = rows[0]
+        for index, prefix in zip(by_cond, prefixes):
+            row = index.get(cond)
+            if row is not None:
                 if first_row is None:
                     first_row = row
                 x_data = row.get('x_data', [])
                 y_data = row.get('y_data', [])
-                y_var = row.get('y_var', [0.0] * len(y_data))
+                y_var = row.get('y_var')
                 combined_x.extend([f"{prefix} {x}" for x in x_data])
                 combined_y.extend(y_data)
                 combined_var.extend(y_var if y_var else [0.0] * len(y_data))
@@ -121,13 +127,12 @@ def merge_plot_data(ip: list[str], prefixes: list[str] | None = None, output_suf
     all_x, all_y, all_var = [], [], []
     for cond in common_conds:
         combined_x, combined_y, combined_var = [], [], []
-        for data, prefix in zip(all_data, prefixes):
-            rows = [d for d in data if d['condition'] == cond]
-            if rows:
-                row = rows[0]
+        for index, prefix in zip(by_cond, prefixes):
+            row = index.get(cond)
+            if row is not None:
                 x_data = row.get('x_data', [])
                 y_data = row.get('y_data', [])
-                y_var = row.get('y_var', [0.0] * len(y_data))
+                y_var = row.get('y_var')
                 combined_x.extend([f"{prefix} {x}" for x in x_data])
                 combined_y.extend(y_data)
                 combined_var.extend(y_var if y_var else [0.0] * len(y_data))
@@ -7,13 +7,13 @@ def normalize(ip: str, norm_type: str, cols: str) -> str:
     col_list = cols.split(',')
     missing = [c for c in col_list if c not in df.columns]
     if missing: print(f"[normalizing] Error: Columns not found: {missing}"); sys.exit(1)
-    for col in col_list:
-        df = df.with_columns((
-            (pl.col(col) - pl.col(col).mean()) / pl.col(col).std() if norm_type == 'zscore' else
-            (pl.col(col) - pl.col(col).min()) / (pl.col(col).max() - pl.col(col).min()) if norm_type == 'minmax' else
-            (pl.col(col) - pl.col(col).median()) / (pl.col(col).quantile(0.75) - pl.col(col).quantile(0.25)) if norm_type == 'robust' else
-            pl.col(col).log() if norm_type == 'log' else pl.col(col)
-        ).alias(f"{col}_norm"))
+    # All columns in one with_columns so polars evaluates them in a single parallel pass
+    df = df.with_columns([(
+        (pl.col(col) - pl.col(col).mean()) / pl.col(col).std() if norm_type == 'zscore' else
+        (pl.col(col) - pl.col(col).min()) / (pl.col(col).max() - pl.col(col).min()) if norm_type == 'minmax' else
+        (pl.col(col) - pl.col(col).median()) / (pl.col(col).quantile(0.75) - pl.col(col).quantile(0.25)) if norm_type == 'robust' else
+        pl.col(col).log() if norm_type == 'log' else pl.col(col)
+    ).alias(f"{col}_norm") for col in dict.fromkeys(col_list)])
     out = f"{os.path.splitext(os.path.basename(ip))[0]}_norm.parquet"
     df.write_parquet(out)
     print(f"[normalizing] Output: {out}")
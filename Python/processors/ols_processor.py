@@ -1,10 +1,12 @@
 """OLS Processor - Fit OLS regression per channel on epoched data.
 Input: parquet with [condition, epoch_id, time, channel_cols...]
 Output: parquet with [channel, condition, beta, tvalue, pvalue, se]"""
-import polars as pl, numpy as np, sys, os
+import polars as pl, numpy as np, sys, os, multiprocessing
 import statsmodels.api as sm
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 
-def ols_process(ip: str, output_suffix: str = 'ols') -> str:
+def ols_process(ip: str, output_suffix: str = 'ols', max_threads: int = 32) -> str:
     if not os.path.exists(ip): print(f"[ols] File not found: {ip}"); sys.exit(1)
     print(f"[ols] OLS regression: {ip}")
     df = pl.read_parquet(ip)
@@ -14,46 +16,41 @@ def ols_process(ip: str, output_suffix: str = 'ols') -> str:
     if not conditions: print("[ols] No conditions found"); sys.exit(1)
     print(f"[ols] {len(ch_cols)} channels, {len(conditions)} conditions")
     
-    # Compute mean per epoch per channel
-    epoch_means = []
-    for eid in df['epoch_id'].unique().to_list():
-        epoch_df = df.filter(pl.col('epoch_id') == eid)
-        cond = str(epoch_df['condition'][0])
-        for ch in ch_cols:
-            vals = epoch_df[ch].to_numpy()
-            mean_val = float(np.mean(vals)) if len(vals) > 0 else 0.0
-            epoch_means.append({
-                'epoch_id': eid,
-                'condition': cond,
-                'channel': ch,
-                'value': mean_val
-            })
-    
-    means_df = pl.DataFrame(epoch_means)
+    # Compute mean per epoch per channel: one row per epoch, channels stay index-aligned columns
+    means_df = df.group_by('epoch_id', maintain_order=True).agg(
+        [pl.col('condition').first().cast(pl.Utf8)] + [pl.col(ch).mean() for ch in ch_cols])
     
     # Build one-hot design matrix
-    n_epochs = len(means_df.filter(pl.col('channel') == ch_cols[0]))
-    cond_list = means_df.filter(pl.col('channel') == ch_cols[0])['condition'].to_list()
+    n_epochs = len(means_df)
+    cond_list = means_df['condition'].to_list()
     X = np.zeros((n_epochs, len(conditions)))
     for i, c in enumerate(cond_list):
         X[i, conditions.index(c)] = 1.0
     X = sm.add_constant(X)
     
-    # Run OLS per channel
+    # Cheap pre-check instead of fitting non-finite data: such channels keep their rows, with NaN estimates
+    fit_cols = [ch for ch in ch_cols if np.isfinite(means_df[ch].to_numpy()).all()]
+    if len(fit_cols) < len(ch_cols):
+        print(f"[ols] Warning: {len(ch_cols) - len(fit_cols)} channel(s) with non-finite epoch means get NaN estimates: {[ch for ch in ch_cols if ch not in fit_cols]}")
+    
+    # Run OLS per channel; fits share X and are BLAS-bound, so a thread pool runs them concurrently
+    with ThreadPoolExecutor(max_workers=max(1, min(max_threads, len(fit_cols)))) as ex:
+        models = dict(zip(fit_cols, ex.map(lambda ch: sm.OLS(means_df[ch].to_numpy(), X).fit(), fit_cols)))
+    
     results = []
+    nan_row = [np.nan] * (len(conditions) + 1)
     for ch in ch_cols:
-        y = means_df.filter(pl.col('channel') == ch)['value'].to_numpy()
-        model = sm.OLS(y, X).fit()
-        
+        model = models.get(ch)
+        params, tvalues, pvalues, bse = (model.params, model.tvalues, model.pvalues, model.bse) if model is not None else (nan_row,) * 4
         # Condition betas (skip intercept at index 0)
         for i, cond in enumerate(conditions):
             results.append({
                 'channel': ch,
                 'condition': cond,
-                'beta': float(model.params[i + 1]),
-                'tvalue': float(model.tvalues[i + 1]),
-                'pvalue': float(model.pvalues[i + 1]),
-                'se': float(model.bse[i + 1])
+                'beta': float(params[i + 1]),
+                'tvalue': float(tvalues[i + 1]),
+                'pvalue': float(pvalues[i + 1]),
+                'se': float(bse[i + 1])
             })
     
     result_df = pl.DataFrame(results)
@@ -63,4 +60,16 @@ def ols_process(ip: str, output_suffix: str = 'ols') -> str:
     print(f"[ols] Output: {out_file} ({len(results)} rows)")
     return out_file
 
-if __name__ == '__main__': (lambda a: ols_process(a[1], a[2] if len(a) > 2 else 'ols') if len(a) >= 2 else (print('[ols] Fit OLS regression per channel on epoched data. Outputs condition betas.\nUsage: ols_processor.py <epochs.parquet> [suffix=ols]'), sys.exit(1)))(sys.argv)
+def ols_process_batch(ips: list[str], output_suffix: str = 'ols') -> list[str]:
+    """Fit several participants independently, one process per input (serial for a single file)."""
+    if len(ips) <= 1: return [ols_process(ip, output_suffix) for ip in ips]
+    print(f"[ols] Batch: {len(ips)} inputs")
+    # Each worker's fit pool gets its share of the cores, so processes x threads stays near the core count
+    n_cpu = os.cpu_count() or 1
+    n_workers = min(len(ips), n_cpu)
+    # Spawned workers: forking after polars has started its thread pool can deadlock
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn')) as ex:
+        return list(ex.map(partial(ols_process, output_suffix=output_suffix, max_threads=max(1, n_cpu // n_workers)), ips))
+
+# CLI: every argument is an input, except a last argument (after at least one input) that is not an existing file: the suffix
+if __name__ == '__main__': (lambda a, has_suffix: ols_process_batch(a[1:-1] if has_suffix else a[1:], a[-1] if has_suffix else 'ols') if len(a) >= 2 else (print('[ols] Fit OLS regression per channel on epoched data. Outputs condition betas.\nUsage: ols_processor.py <epochs.parquet> [more_epochs.parquet ...] [suffix=ols]'), sys.exit(1)))(sys.argv, len(sys.argv) > 2 and not os.path.exists(sys.argv[-1]))
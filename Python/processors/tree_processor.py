@@ -12,20 +12,20 @@ def preprocess_run(ip, entry_delim, depth_key, kv_delim):
     for block in raw:
         entries.extend([e for e in block.split(entry_delim) if e.strip()])
     print(f"[tree] Processing {len(entries)} entries")
-    # Step 2: Create flat struct list
-    flat_structs = [{'key': (k := entry.split(kv_delim, 1))[0].strip(), 'value': k[1].strip(), 'raw': entry} if kv_delim in entry else {'key': None, 'value': None, 'raw': entry} for entry in entries]
+    # Step 2: Create flat (key, value) list; compact tuples, the raw entry text is not kept
+    flat_structs = [((k := entry.split(kv_delim, 1))[0].strip(), k[1].strip()) if kv_delim in entry else (None, None) for entry in entries]
     # Step 3: Build tree using depth delimiter and rules
     root = TreeNode(entry=None)
     anon = TreeNode(entry=None)
     root.children.append(anon)
     stack = [root, anon]
     prev_level = None
-    for fs in flat_structs:
-        if fs['key'] == depth_key and fs['value'] and fs['value'].isdigit():
-            level = int(fs['value'])
+    for fs_key, fs_value in flat_structs:
+        if fs_key == depth_key and fs_value and fs_value.isdigit():
+            level = int(fs_value)
             # Create new ANON entity with Level property as first leaf
             entity = TreeNode(entry=None)
-            level_prop = TreeNode(entry=fs['key'], value=fs['value'])
+            level_prop = TreeNode(entry=fs_key, value=fs_value)
             entity.children.append(level_prop)
             
             if prev_level is None:
@@ -47,7 +47,7 @@ def preprocess_run(ip, entry_delim, depth_key, kv_delim):
                 stack.append(entity)
             prev_level = level
         else:
-            prop_node = TreeNode(entry=fs['key'], value=fs['value'])
+            prop_node = TreeNode(entry=fs_key, value=fs_value)
             stack[-1].children.append(prop_node)
     print(f"[tree] Built tree: root with {len(root.children)} children")
     
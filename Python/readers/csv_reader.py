@@ -4,11 +4,12 @@ if __name__ == "__main__":
     get_output_filename = lambda input_file: f"{os.path.splitext(os.path.basename(input_file))[0]}_csv.parquet"
     run = lambda input_csv: (
         print(f"[csv_reader] Started for: {input_csv}") or
-        (lambda df:
-            print(f"[csv_reader] CSV file loaded: {input_csv}, shape: {df.shape}") or
-            df.write_parquet(get_output_filename(input_csv)) or
-            print(f"[csv_reader] Parquet file saved: {get_output_filename(input_csv)}")
-        )(pl.read_csv(input_csv))
+        # Streamed CSV -> Parquet: the table is never materialized; shape comes from the Parquet metadata
+        pl.scan_csv(input_csv).sink_parquet(get_output_filename(input_csv)) or
+        (lambda out:
+            print(f"[csv_reader] CSV file loaded: {input_csv}, shape: ({pl.scan_parquet(out).select(pl.len()).collect().item()}, {len(pl.read_parquet_schema(out))})") or
+            print(f"[csv_reader] Parquet file saved: {out}")
+        )(get_output_filename(input_csv))
     )
     try:
         args = sys.argv
@@ -50,16 +50,31 @@ def save_as_mne(stream, out_path, stream_type):
     raw.save(out_path, overwrite=True, verbose=False)
     return True
 
-def read_xdf(ip):
+def outputs_current(ip, signal_path, out_folder, base):
+    """True if a previous run's outputs exist and are all newer than the input .xdf."""
+    if not os.path.exists(signal_path): return False
+    src_mtime = os.path.getmtime(ip)
+    if os.path.getmtime(signal_path) < src_mtime: return False
+    n_streams = pl.read_parquet(signal_path, columns=['streams'])['streams'][0]
+    outs = [os.path.join(out_folder, f"{base}_xdf{i+1}.{ext}") for i in range(n_streams) for ext in ('fif', 'parquet')]
+    return all(os.path.exists(o) and os.path.getmtime(o) >= src_mtime for o in outs)
+
+def read_xdf(ip, use_cache: bool = True):
+    base = os.path.splitext(os.path.basename(ip))[0]
+    workspace_root = os.getcwd()
+    out_folder = os.path.join(workspace_root, f"{base}_xdf")
+    signal_path = os.path.join(workspace_root, f"{base}_xdf.parquet")
+    # Loading the .xdf dominates runtime: reuse the converted streams when the input has not changed since
+    # (use_cache=False / CLI 'false' forces a reconversion)
+    if use_cache and outputs_current(ip, signal_path, out_folder, base):
+        print(f"[xdf_reader] Up to date, reusing: {signal_path}")
+        return
     print(f"[xdf_reader] Loading: {ip}")
     print(f"[xdf_reader] File size: {os.path.getsize(ip) / (1024*1024):.1f} MB - this may take a while...")
     import time
     t0 = time.time()
     streams = pyxdf.load_xdf(ip)[0]
     print(f"[xdf_reader] Loaded {len(streams)} streams in {time.time()-t0:.1f}s")
-    base = os.path.splitext(os.path.basename(ip))[0]
-    workspace_root = os.getcwd()
-    out_folder = os.path.join(workspace_root, f"{base}_xdf")
     os.makedirs(out_folder, exist_ok=True)
     
     # Collect stream info for signal file
@@ -96,7 +111,6 @@ def read_xdf(ip):
         })
     
     # Write signal file with stream mapping
-    signal_path = os.path.join(workspace_root, f"{base}_xdf.parquet")
     signal_df = pl.DataFrame({
         'signal': [1], 
         'source': [os.path.basename(ip)], 
@@ -108,5 +122,5 @@ def read_xdf(ip):
     signal_df.write_parquet(signal_path)
     print(f"[xdf_reader] Output: {signal_path}")
 
-if __name__ == '__main__': (lambda a: read_xdf(a[1]) if len(a) == 2 else (print("[xdf_reader] Usage: python xdf_reader.py <input.xdf>"), sys.exit(1)))(sys.argv)
+if __name__ == '__main__': (lambda a: read_xdf(a[1], len(a) < 3 or a[2].lower() not in ['0','false','no']) if len(a) in (2, 3) else (print("[xdf_reader] Usage: python xdf_reader.py <input.xdf> [use_cache=true]"), sys.exit(1)))(sys.argv)
 
@@ -1,19 +1,64 @@
-﻿import polars as pl, matplotlib.pyplot as plt, sys, os, shutil, tempfile, re
+﻿import matplotlib; matplotlib.use('Agg')  # Headless PDF output only: pin Agg so nothing probes for a GUI backend
+import polars as pl, sys, os, shutil, tempfile, re, functools, hashlib
 import numpy as np
-from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.backends.backend_pdf import PdfPages, FigureCanvasPdf
+from matplotlib.figure import Figure
+from matplotlib.colors import to_rgba
 
-sanitize = lambda v: re.sub(r"[^A-Za-z0-9._-]", "_", str(v))
+# File-name sanitizing: pattern compiled once, results memoized per prefix (run() sanitizes the same prefix repeatedly)
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9._-]")
+sanitize = functools.lru_cache(maxsize=256)(lambda v: _UNSAFE_RE.sub("_", str(v)))
 to_lst = lambda x: x.to_list() if isinstance(x, pl.Series) else (x if isinstance(x, list) else [])
-truncate = lambda s, max_len=40: (s if len(s) <= max_len else s[:max_len-3] + '...') if isinstance(s, str) else s
+# Memoized: grid subplots share their category labels, and the same labels recur across plot() calls
+truncate = functools.lru_cache(maxsize=256)(lambda s, max_len=40: (s if len(s) <= max_len else s[:max_len-3] + '...') if isinstance(s, str) else s)
 # Convert None values to NaN for matplotlib compatibility
 safe_yerr = lambda yerr: [np.nan if x is None else x for x in yerr] if yerr else None
-attach = lambda t, o, i: ((lambda r, w: ([w.add_page(p) for p in r.pages], w.add_metadata({"/Producer": "EmotiView", "/Conformance": "/PDF/A-1b"}), w.add_attachment(os.path.basename(i), open(i, 'rb').read()), (lambda f: (w.write(f), f.close()))(open(o, 'wb')), os.remove(t), o))(__import__('pypdf').PdfReader(t), __import__('pypdf').PdfWriter()) if __import__('importlib').util.find_spec('pypdf') else (shutil.move(t, o), o)[-1])
+# Optional dependency probed once at import instead of per attach()/run() call
+_HAS_PYPDF = __import__('importlib').util.find_spec('pypdf') is not None
+def _bar_groups(y_data, y_var, n_cond: int, n_cats: int) -> tuple:
+    """Per-category bar heights and error bars of a grouped bar plot; each dataset's lists are converted once."""
+    rows = [to_lst(y_data[i]) for i in range(n_cond)]
+    heights = [[r[j] for r in rows] for j in range(n_cats)]
+    if not y_var:
+        return heights, None
+    # Missing error values count as 0, None becomes NaN (safe_yerr)
+    var_rows = [to_lst(y_var[i]) if i < len(y_var) else [] for i in range(n_cond)]
+    return heights, [safe_yerr([v[j] if j < len(v) else 0 for v in var_rows]) for j in range(n_cats)]
+
+def _to_plot_array(v):
+    """Numeric series as one contiguous float64 array (matplotlib's own dtype); other data is returned unchanged."""
+    arr = np.asarray(v)
+    return np.ascontiguousarray(arr, dtype=np.float64) if arr.dtype.kind in 'iuf' else v
+
+# Greyscale series palette, resolved to RGBA once at import (no colour-name lookup per artist); single-series plots use its first colour
+_PALETTE = tuple(to_rgba(c) for c in ('dimgray', 'darkgray', 'gray', 'lightgray', 'silver'))
+palette_color = lambda i: _PALETTE[i % len(_PALETTE)]
+# Shared style defaults, built once; ** unpacking shallow-copies them per call (matplotlib copies error_kw itself)
+_BAR_KW = {'alpha': 0.85, 'capsize': 4, 'error_kw': {'linewidth': 1.5}}
+_GRID_KW = {'alpha': 0.25, 'linestyle': '--', 'linewidth': 0.8}
+def _style_axes(ax) -> None:
+    """Shared axes styling: dashed grid and open top/right frame; each spine group is set in one call."""
+    ax.grid(True, **_GRID_KW)
+    ax.spines[['top', 'right']].set_visible(False)
+    ax.spines[['left', 'bottom']].set_linewidth(1.2)
+
+def _rotate_xticklabels(ax) -> None:
+    """Diagonal x tick labels on this Axes only (no pyplot current-figure lookup)."""
+    ax.tick_params(axis='x', labelrotation=45)
+    for t in ax.get_xticklabels(): t.set_horizontalalignment('right')
+
+def _new_fig(figsize: tuple, n_rows: int = 1, n_cols: int = 1) -> tuple:
+    """(fig, axes) of a constrained-layout figure outside pyplot (no global registry) with a PDF canvas bound for the save."""
+    fig = Figure(figsize=figsize, constrained_layout=True)
+    FigureCanvasPdf(fig)
+    return fig, fig.subplots(n_rows, n_cols)  # Single Axes for 1x1, else an array, as plt.subplots
+
+attach = lambda t, o, i: ((lambda r, w: ([w.add_page(p) for p in r.pages], w.add_metadata({"/Producer": "EmotiView", "/Conformance": "/PDF/A-1b"}), w.add_attachment(os.path.basename(i), open(i, 'rb').read()), (lambda f: (w.write(f), f.close()))(open(o, 'wb')), os.remove(t), o))(__import__('pypdf').PdfReader(t), __import__('pypdf').PdfWriter()) if _HAS_PYPDF else (shutil.move(t, o), o)[-1])
 
 def plot(df, pdf_path):
     """Generic plotter: handles concatenated data from concatenating_processor."""
     print(f"[plotter] Plotting started: {pdf_path}")
-    pdf = PdfPages(pdf_path)
-    row = df.to_dicts()[0]
+    row = df.row(0, named=True)  # Only the first row is plotted: no dicts built for the others
     x_data, y_data, y_var, labels = to_lst(row['x_data']), to_lst(row['y_data']), to_lst(row.get('y_var', [])), to_lst(row.get('labels', []))
     # Extract plot_type - handle nested lists from concatenation
     raw_plot_type = row['plot_type']
@@ -28,44 +73,37 @@ def plot(df, pdf_path):
     is_concat_y = y_data and isinstance(y_data[0], (list, tuple))
     is_concat_x = x_data and isinstance(x_data[0], (list, tuple))
     is_concat = is_concat_y or is_concat_x
-    colors = ['dimgray', 'darkgray', 'gray', 'lightgray', 'silver']
     lbl = lambda i: labels[i] if i < len(labels) else f'Dataset {i+1}'
     
     print(f"[plotter] Plot type: {plot_type}, Concatenated: {is_concat} (x={is_concat_x}, y={is_concat_y}), Labels: {labels if labels else 'none'}")
     
     # Grid layout for line_grid or grid: separate subplot per condition
-    if (plot_type == 'line_grid' or plot_type == 'grid') and is_concat:
-        # For grid/bar plots with flat x_data, n_plots is determined by y_data
-        n_plots = len(y_data) if is_concat_y else len(x_data)
-        n_cols = min(3, n_plots)
-        n_rows = (n_plots + n_cols - 1) // n_cols
-        print(f"[plotter] Creating grid: {n_rows}x{n_cols} for {n_plots} conditions")
-        # Add extra space at top for suptitle
-        fig, axes = plt.subplots(n_rows, n_cols, figsize=(6*n_cols, 4*n_rows + 0.5))
-        axes = axes.flatten() if n_plots > 1 else [axes]
-        
-        # Calculate global axis limits for consistent scaling across all subplots
-        all_x_data, all_y_data = [], []
-        
+    is_grid = (plot_type == 'line_grid' or plot_type == 'grid') and is_concat
+    if is_grid:
+        # Resolved once: within the grid branch plot_type is either 'grid' (bars) or 'line_grid' (lines)
+        is_bar_grid = plot_type == 'grid'
+        # Each subplot's series converted to lists in one pass; the global limits and the subplot loop share them.
         # Handle flat x_data (grid/bar with shared categories) vs nested x_data (line_grid)
         if is_concat_x:
-            for xd, yd in zip(x_data, y_data):
-                xd_list, yd_list = to_lst(xd), to_lst(yd)
-                all_x_data.extend(xd_list)
-                all_y_data.extend(yd_list)
+            panels = [(to_lst(xd), to_lst(yd)) for xd, yd in zip(x_data, y_data)]
+            all_x_data = [v for xd_list, _ in panels for v in xd_list]
         else:
             # x_data is flat (shared categories), y_data is nested
             all_x_data = to_lst(x_data)
-            for yd in y_data:
-                all_y_data.extend(to_lst(yd))
-        
+            panels = [(all_x_data, to_lst(yd)) for yd in y_data]
+        # Calculate global axis limits for consistent scaling across all subplots
+        all_y_data = [v for _, yd_list in panels for v in yd_list]
+        # Validated before any figure exists: empty series would otherwise fail mid-plot with a figure left open
+        if not all_y_data or (not is_bar_grid and not all_x_data):
+            raise ValueError(f"No data to plot for '{plot_type}' (labels: {labels or 'none'})")
+    
         # Calculate global limits for both x and y axes
         y_min, y_max = min(all_y_data), max(all_y_data)
         y_range = y_max - y_min
         y_margin = y_range * 0.1  # 10% margin
         global_y_lim = (y_min - y_margin, y_max + y_margin)
-        
-        if plot_type == 'line_grid':
+    
+        if not is_bar_grid:
             # For line plots, also calculate x-axis limits
             x_min, x_max = min(all_x_data), max(all_x_data)
             x_range = x_max - x_min
@@ -74,20 +112,33 @@ def plot(df, pdf_path):
         else:
             # For bar plots, x-axis is categorical (no global x limit needed)
             global_x_lim = None
-        
+    
+        # For grid/bar plots with flat x_data, n_plots is determined by y_data
+        n_plots = len(y_data) if is_concat_y else len(x_data)
+        n_cols = min(3, n_plots)
+        n_rows = (n_plots + n_cols - 1) // n_cols
+        print(f"[plotter] Creating grid: {n_rows}x{n_cols} for {n_plots} conditions")
+        # Add extra space at top for suptitle; constrained layout sizes the rotated labels at draw time
+        fig_size = (6*n_cols, 4*n_rows + 0.5)
+        fig, axes = _new_fig(fig_size, n_rows, n_cols)
+        axes = axes.flatten() if n_plots > 1 else [axes]
+    
+        # Row fields shared by every subplot, looked up once
+        yt, yl = row.get('y_ticks'), row.get('y_labels')
+        x_axis_label = row.get('x_axis', '') if is_bar_grid else row.get('x_label', '')
+        y_axis_label = row.get('y_label', '')
+    
         # Iterate over conditions - handle flat x_data (shared) vs nested x_data
         for i in range(n_plots):
             ax = axes[i]
-            # For grid/bar with flat x_data, use shared x_data for all subplots
-            xd = x_data[i] if is_concat_x else x_data
-            yd = y_data[i]
+            # For grid/bar with flat x_data, the shared x_data list is used for all subplots
+            xd_list, yd_list = panels[i]
             yv = y_var[i] if y_var and i < len(y_var) else None
-            xd_list, yd_list = to_lst(xd), to_lst(yd)
-            
+        
             # For 'grid' type (bar plots), create bar chart
-            if plot_type == 'grid':
+            if is_bar_grid:
                 yerr_safe = safe_yerr(to_lst(yv)) if yv else None
-                ax.bar(range(len(yd_list)), yd_list, yerr=yerr_safe, color='dimgray', alpha=0.85, capsize=4, error_kw={'linewidth': 1.5})
+                ax.bar(range(len(yd_list)), yd_list, yerr=yerr_safe, color=_PALETTE[0], **_BAR_KW)
                 ax.set_xticks(range(len(xd_list)))
                 ax.set_xticklabels([truncate(x) for x in xd_list], rotation=45, ha='right', fontsize=9)
                 # Move x-axis labels to bottom (important for plots with negative values like fnirs_rel)
@@ -95,8 +146,6 @@ def plot(df, pdf_path):
                 ax.tick_params(axis='x', which='both', bottom=True, labelbottom=True)
                 ax.spines['bottom'].set_position(('axes', 0))  # Keep spine at bottom
                 # Check if y_ticks or y_labels override is set (for fixed Y-axis limits)
-                yt = row.get('y_ticks')
-                yl = row.get('y_labels')
                 if yl and isinstance(yl, (list, tuple)) and len(yl) > 2:
                     # Questionnaire scale with endpoint labels: y-axis is 1 to N
                     ax.set_ylim(0.5, len(yl) + 0.5)
@@ -110,34 +159,33 @@ def plot(df, pdf_path):
                 else:
                     ax.set_ylim(global_y_lim)
             else:
-                # For 'line_grid' type, create line plot
-                ax.plot(xd_list, yd_list, linewidth=2.5, alpha=0.85, color='dimgray')
-                
+                # For 'line_grid' type, create line plot; the series are converted to arrays once for line and band
+                x_arr, y_arr = _to_plot_array(xd_list), _to_plot_array(yd_list)
+                ax.plot(x_arr, y_arr, linewidth=2.5, alpha=0.85, color=_PALETTE[0])
+            
                 # Add shaded error region if variance provided
                 if yv is not None:
                     yv_list = to_lst(yv)
-                    import numpy as np
                     # Filter out None values
                     if yv_list and all(v is not None for v in yv_list):
-                        ax.fill_between(xd_list, [y - e for y, e in zip(yd_list, yv_list)], 
-                                       [y + e for y, e in zip(yd_list, yv_list)], alpha=0.3, color='dimgray')
-                
+                        # Band edges computed as arrays in one step (zip semantics: shortest series wins)
+                        n = min(len(yd_list), len(yv_list))
+                        y_band, e_arr = np.asarray(y_arr[:n], dtype=np.float64), np.asarray(yv_list[:n], dtype=np.float64)
+                        ax.fill_between(x_arr, y_band - e_arr, y_band + e_arr, alpha=0.3, color=_PALETTE[0])
+            
                 if global_x_lim:
                     ax.set_xlim(global_x_lim)
                 # Check if y_ticks override is set (for fixed Y-axis limits across participants)
-                yt = row.get('y_ticks')
                 if yt and isinstance(yt, (int, float)):
                     ax.set_ylim(0, yt)
                 else:
                     ax.set_ylim(global_y_lim)
-            
+        
             ax.set_title(lbl(i), fontsize=14, fontweight='bold')
-            ax.set_xlabel(row.get('x_label', '') if plot_type == 'line_grid' else row.get('x_axis', ''), fontsize=12)
-            ax.set_ylabel(row.get('y_label', ''), fontsize=12)
+            ax.set_xlabel(x_axis_label, fontsize=12)
+            ax.set_ylabel(y_axis_label, fontsize=12)
             # Apply y_ticks/y_labels for questionnaire scale labels (grid/bar plots only)
-            yt = row.get('y_ticks')
-            yl = row.get('y_labels')
-            if plot_type == 'grid':
+            if is_bar_grid:
                 if yt and isinstance(yt, int):
                     # y_ticks is int: use as scale max
                     ax.set_yticks(list(range(1, yt + 1)))
@@ -160,60 +208,101 @@ def plot(df, pdf_path):
                     ax.set_yticks(list(range(1, len(yl) + 1)))
                     ax.set_yticklabels(yl, fontsize=9)
                     ax.set_ylim(0.5, len(yl) + 0.5)
-            ax.grid(True, alpha=0.25, linestyle='--', linewidth=0.8)
-            [ax.spines[s].set_visible(False) for s in ['top', 'right']]
-            [ax.spines[s].set_linewidth(1.2) for s in ['left', 'bottom']]
-        
+            _style_axes(ax)
+            # Rotate x-axis labels diagonally (same as singular plots)
+            _rotate_xticklabels(ax)
+    
         # Hide unused subplots
-        for i in range(n_plots, len(axes)):
-            axes[i].set_visible(False)
-        
-        # Rotate x-axis labels diagonally for all subplots (same as singular plots)
-        for ax in axes[:n_plots]:
-            plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-        
-        # Use tight_layout with rect to leave space for rotated labels
-        fig.tight_layout(rect=[0, 0.05, 1, 1])  # [left, bottom, right, top]
+        for ax in axes[n_plots:]:
+            ax.set_visible(False)
+
     else:
         # Original single-plot layout
-        fig, ax = plt.subplots(figsize=(12, 6))
-        
+        fig_size = (12, 6)
+        fig, ax = _new_fig(fig_size)
+    
         # For bar plots with concatenated y_data but flat x_data, use x_data directly as categories
         # This handles cases like fnirs_asym where x_data=['Left PFC-Right PFC'] and y_data=[[-5.3], [9.5], [-2.2]]
         get_cats = lambda: to_lst(x_data[0]) if is_concat_x else x_data
-        
-        (([ax.plot(to_lst(xd), to_lst(yd), linewidth=2.5, label=lbl(i), alpha=0.85, color=colors[i % len(colors)]) for i, (xd, yd) in enumerate(zip(x_data, y_data))], ax.legend(loc='upper right', fontsize=11, framealpha=0.95, edgecolor='gray')) if plot_type == 'line' else
-         ([ax.scatter(to_lst(xd), to_lst(yd), s=50, label=lbl(i), alpha=0.7, color=colors[i % len(colors)]) for i, (xd, yd) in enumerate(zip(x_data, y_data))], ax.legend(loc='upper right', fontsize=11, framealpha=0.95, edgecolor='gray')) if plot_type == 'scatter' else
-         (lambda n_cond, cats, w: ([ax.bar([i + (j - len(cats)/2 + 0.5) * w for i in range(n_cond)], [to_lst(y_data[i])[j] for i in range(n_cond)], width=w, label=cats[j], yerr=safe_yerr([to_lst(y_var[i])[j] if i < len(y_var) and j < len(to_lst(y_var[i])) else 0 for i in range(n_cond)]) if y_var else None, color=colors[j % len(colors)], alpha=0.85, capsize=4, error_kw={'linewidth': 1.5}) for j in range(len(cats))], ax.set_xticks(range(n_cond)), ax.set_xticklabels(labels, rotation=45, ha='right', fontsize=11), ax.legend(loc='upper right', fontsize=10, framealpha=0.95, edgecolor='gray')))(len(labels), get_cats(), 0.75 / len(get_cats()) if len(get_cats()) > 0 else 0.75) if plot_type == 'bar' else None) if is_concat else (
-         ax.plot(x_data, y_data, linewidth=2.5, alpha=0.85, color='dimgray') if plot_type == 'line' else
-         ax.scatter(x_data, y_data, s=50, alpha=0.7, color='dimgray') if plot_type == 'scatter' else
-         (ax.bar(range(len(y_data)), y_data, yerr=safe_yerr(y_var) if y_var else None, color='dimgray', alpha=0.85, capsize=4, error_kw={'linewidth': 1.5}), ax.set_xticks(range(len(x_data))), ax.set_xticklabels([truncate(x) for x in x_data], rotation=45, ha='right', fontsize=10)))
-        
+        # Grouped bars: one group per dataset in y_data; missing labels fall back to lbl()'s 'Dataset N' instead of no bars
+    
+        (([ax.plot(_to_plot_array(to_lst(xd)), _to_plot_array(to_lst(yd)), linewidth=2.5, label=lbl(i), alpha=0.85, color=palette_color(i)) for i, (xd, yd) in enumerate(zip(x_data, y_data))], ax.legend(loc='upper right', fontsize=11, framealpha=0.95, edgecolor='gray')) if plot_type == 'line' else
+         ([ax.scatter(_to_plot_array(to_lst(xd)), _to_plot_array(to_lst(yd)), s=50, label=lbl(i), alpha=0.7, color=palette_color(i)) for i, (xd, yd) in enumerate(zip(x_data, y_data))], ax.legend(loc='upper right', fontsize=11, framealpha=0.95, edgecolor='gray')) if plot_type == 'scatter' else
+         (lambda n_cond, cats: (lambda w, groups: ([ax.bar([i + (j - len(cats)/2 + 0.5) * w for i in range(n_cond)], groups[0][j], width=w, label=cats[j], yerr=groups[1][j] if groups[1] is not None else None, color=palette_color(j), **_BAR_KW) for j in range(len(cats))], ax.set_xticks(range(n_cond)), ax.set_xticklabels([lbl(i) for i in range(n_cond)], rotation=45, ha='right', fontsize=11), ax.legend(loc='upper right', fontsize=10, framealpha=0.95, edgecolor='gray')))(0.75 / len(cats) if len(cats) > 0 else 0.75, _bar_groups(y_data, y_var, n_cond, len(cats))))(len(y_data) if is_concat_y else len(labels), get_cats()) if plot_type == 'bar' else None) if is_concat else (
+         ax.plot(_to_plot_array(x_data), _to_plot_array(y_data), linewidth=2.5, alpha=0.85, color=_PALETTE[0]) if plot_type == 'line' else
+         ax.scatter(_to_plot_array(x_data), _to_plot_array(y_data), s=50, alpha=0.7, color=_PALETTE[0]) if plot_type == 'scatter' else
+         (ax.bar(range(len(y_data)), y_data, yerr=safe_yerr(y_var) if y_var else None, color=_PALETTE[0], **_BAR_KW), ax.set_xticks(range(len(x_data))), ax.set_xticklabels([truncate(x) for x in x_data], rotation=45, ha='right', fontsize=10)))
+    
         ax.set_xlabel(row.get('x_axis') or row.get('x_label', ''), fontsize=13, fontweight='medium')
         ax.set_ylabel(row.get('y_axis') or row.get('y_label', ''), fontsize=13, fontweight='medium')
         (lambda yt: (ax.set_yticks(list(range(1, len(yt) + 1))), ax.set_yticklabels(yt, fontsize=9), ax.set_ylim(0.5, len(yt) + 0.5)) if yt and isinstance(yt, (list, tuple)) else ax.tick_params(labelsize=11))(row.get('y_ticks'))
-        ax.grid(True, alpha=0.25, linestyle='--', linewidth=0.8); [ax.spines[s].set_visible(False) for s in ['top', 'right']]; [ax.spines[s].set_linewidth(1.2) for s in ['left', 'bottom']]
-        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')  # Ensure diagonal labels
-        fig.tight_layout(rect=[0, 0.05, 1, 1])  # Leave space for rotated labels
-    
-    pdf.savefig(fig, bbox_inches='tight', dpi=300); plt.close(fig); pdf.close()
+        _style_axes(ax)
+        _rotate_xticklabels(ax)  # Ensure diagonal labels
+
+    # No bbox_inches='tight': the layout is already fitted, and a tight bbox renders the figure twice per save
+    # Printed through a PDF canvas bound to the figure: pdf.savefig would build a fresh canvas for every save
+    with PdfPages(pdf_path) as pdf:  # Opened only once the page is drawn; closed even if printing fails
+        fig.canvas.print_figure(pdf, format='pdf', dpi=300)
     print(f"[plotter] Plotting finished: {pdf_path}")
     return pdf_path
 
-def run(inp, out_dir, pre):
+# Output directories already created by this process; repeated run() calls skip the makedirs stat calls
+_MADE_DIRS: set[str] = set()
+
+def _ensure_dir(d: str) -> None:
+    """os.makedirs(d, exist_ok=True), once per directory per process."""
+    if d not in _MADE_DIRS:
+        os.makedirs(d, exist_ok=True)
+        _MADE_DIRS.add(d)
+
+@functools.lru_cache(maxsize=1)
+def _plotter_digest() -> bytes:
+    """Digest of this module's source, read on first use: any change to the plotting code invalidates cached PDFs."""
+    with open(__file__, 'rb') as f: return hashlib.blake2b(f.read(), digest_size=16).digest()
+
+def plot_fingerprint(inp: str, out_pdf: str) -> str:
+    """Content hash of the input parquet, the output PDF path and the plotter source; unchanged inputs give an identical fingerprint."""
+    h = hashlib.blake2b(_plotter_digest(), digest_size=16)
+    with open(inp, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    h.update(out_pdf.encode())
+    return h.hexdigest()
+
+def _fp_matches(fp_path: str, fp: str) -> bool:
+    """True when the fingerprint sidecar exists and records fp."""
+    if not os.path.exists(fp_path): return False
+    with open(fp_path) as f: return f.read() == fp
+
+def run(inp, out_dir, pre, render: bool = True):
     print(f"[plotter] Input: {inp}, Output dir: {out_dir}, Prefix: {pre}")
-    df = pl.read_parquet(inp); os.makedirs(out_dir, exist_ok=True)
-    tf = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf'); tf_path = (plot(df, tf.name), tf.close(), tf.name)[2]
+    _ensure_dir(out_dir)
     out_pdf = os.path.join(out_dir, f"{pre}.pdf")
     comb_pq = os.path.join(os.getcwd(), f"{sanitize(pre)}_data.parquet")
-    df.write_parquet(comb_pq)
-    # Attach data to PDF if pypdf available, then clean up temp files
-    if __import__('importlib').util.find_spec('pypdf'):
-        attach(tf_path, out_pdf, comb_pq)
-        os.remove(comb_pq)  # Remove temp data file after embedding in PDF
+    # Content hash rather than mtime: the same data re-staged by a new pipeline run still matches.
+    # The sidecar lives in the work dir (hidden), never next to the PDF deliverable
+    fp, fp_path = (plot_fingerprint(inp, out_pdf), os.path.join(os.getcwd(), f".{sanitize(pre)}_plot.fp")) if render else (None, None)
+    if not render:
+        # Data-only export for callers that need no figure: the parquet is copied as is, nothing is decoded or drawn
+        out_pdf = ''
+        shutil.copy2(inp, comb_pq)
+        print(f"[plotter] Rendering skipped, data only: {sanitize(pre)}_data.parquet")
+    elif os.path.exists(out_pdf) and _fp_matches(fp_path, fp):
+        print(f"[plotter] Input unchanged, reusing {out_pdf}")
+        # Same side outputs as a fresh render: without pypdf the data parquet stays next to the PDF
+        if not _HAS_PYPDF: shutil.copy2(inp, comb_pq)
     else:
-        shutil.copy2(tf_path, out_pdf)
-        os.remove(tf_path)
+        df = pl.read_parquet(inp)
+        tf = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf'); tf_path = (plot(df, tf.name), tf.close(), tf.name)[2]
+        df.write_parquet(comb_pq)
+        # Attach data to PDF if pypdf available, then clean up temp files
+        if _HAS_PYPDF:
+            attach(tf_path, out_pdf, comb_pq)
+            os.remove(comb_pq)  # Remove temp data file after embedding in PDF
+        else:
+            shutil.copy2(tf_path, out_pdf)
+            os.remove(tf_path)
+        with open(fp_path, 'w') as f: f.write(fp)
     # Write signal file in workspace root for nextflow
     sig = f"{sanitize(pre)}_plot.parquet"
     pl.DataFrame({'signal': [1], 'source_parquet': [os.path.basename(inp)], 'output_prefix': [pre], 'pdf_path': [out_pdf]}).write_parquet(sig + '.tmp')
@@ -223,4 +312,4 @@ def run(inp, out_dir, pre):
     print(sig)
     return out_pdf
 
-if __name__ == '__main__': (lambda a: run(a[1], a[2], a[3] if len(a) > 3 else "plot") if len(a) >= 3 else (print("Usage: python plotter.py <input.parquet> <output_dir> [prefix]"), sys.exit(1)))(sys.argv)
+if __name__ == '__main__': (lambda a: run(a[1], a[2], a[3] if len(a) > 3 else "plot", len(a) <= 4 or a[4].lower() not in ['0','false','no']) if len(a) >= 3 else (print("Usage: python plotter.py <input.parquet> <output_dir> [prefix] [render=true]"), sys.exit(1)))(sys.argv)
@@ -15,5 +15,5 @@ def inspect_xdf_file(xdf_path: str, logger: logging.Logger) -> Any:
     """
     Inspects an XDF file for structure and content (placeholder).
     """
-    logger.info(f"XDFInspector: Inspecting XDF file at {xdf_path} (placeholder, implement actual logic).")
+    logger.info("XDFInspector: Inspecting XDF file at %s (placeholder, implement actual logic).", xdf_path)
     return None
\ No newline at end of file